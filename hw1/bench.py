@@ -0,0 +1,164 @@
+import argparse
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Callable, Iterator, List, Tuple
+
+from main import ShellEngine, XmlLogWriter
+
+FILES_PER_DIR = 100
+FORMATS = {
+    "tar": "w",
+    "tar.gz": "w:gz",
+    "tar.xz": "w:xz",
+    "zip": None,
+}
+
+
+def bench_log(actions: int = 100_000, window: int = 10_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = XmlLogWriter(os.path.join(tmp_dir, "log.xml"))
+        print(f"log: {actions} actions, cost per action in windows of {window}")
+        start = time.perf_counter()
+        costs = []
+        for i in range(1, actions + 1):
+            writer.append(
+                {
+                    "user": "bench",
+                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "command": "ls",
+                }
+            )
+            if i % window == 0:
+                now = time.perf_counter()
+                costs.append((now - start) / window)
+                print(f"  {i:>8} actions: {costs[-1] * 1e6:8.2f} us/action")
+                start = now
+        writer.close()
+        print(f"  last/first window ratio: {costs[-1] / costs[0]:.2f}")
+
+
+def archive_names(entries: int) -> Iterator[Tuple[str, bool]]:
+    """Yield ``entries`` member names: directories of ``.log`` files.
+
+    Every file name is unique, so name-based lookups in ``find`` scale with
+    the archive instead of hitting a small set of repeated names.
+    """
+    written = 0
+    dir_index = 0
+    while written < entries:
+        dir_name = f"dir_{dir_index:06d}"
+        yield dir_name, True
+        written += 1
+        for _ in range(min(FILES_PER_DIR, entries - written)):
+            yield f"{dir_name}/file_{written:07d}.log", False
+            written += 1
+        dir_index += 1
+
+
+def generate_archive(path: str, entries: int, archive_format: str = "tar") -> None:
+    mode = FORMATS[archive_format]
+    if mode is None:
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, is_dir in archive_names(entries):
+                archive.writestr(name + "/" if is_dir else name, "" if is_dir else name)
+        return
+    with tarfile.open(path, mode) as tar:
+        for name, is_dir in archive_names(entries):
+            info = tarfile.TarInfo(name)
+            if is_dir:
+                info.type = tarfile.DIRTYPE
+            tar.addfile(info)
+
+
+def commands_per_second(
+    engine: ShellEngine, commands: List[str], min_time: float
+) -> float:
+    executed = 0
+    start = time.perf_counter()
+    while True:
+        for command in commands:
+            engine.execute_command(command)
+        executed += len(commands)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return executed / elapsed
+
+
+def bench_commands(sizes: List[int], min_time: float = 1.0) -> None:
+    workloads = {
+        "ls": ["ls"],
+        "cd": ["cd dir_000000", "cd .."],
+        "tree": ["tree"],
+        "find exact": ["find file_0000042.log"],
+        "find prefix": ["find file_000004*"],
+        "find suffix": ["find *00042.log"],
+        "find glob": ["find file_00?0042.log"],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, "config.csv")
+        for entries in sizes:
+            tar_file = os.path.join(tmp_dir, f"tree_{entries}.tar")
+            generate_archive(tar_file, entries)
+            with open(config_file, "w") as f:
+                f.write("user,hostname,tar_file,log_file\n")
+                f.write(f"bench,localhost,{tar_file},{tmp_dir}/log.xml\n")
+            with open(os.devnull, "w") as devnull:
+                start = time.perf_counter()
+                engine = ShellEngine(config_file, devnull)
+                load_time = time.perf_counter() - start
+                print(f"{entries} entries (loaded in {load_time:.2f}s):")
+                for name, commands in workloads.items():
+                    rate = commands_per_second(engine, commands, min_time)
+                    print(f"  {name:<12} {rate:12.1f} commands/s")
+                engine.close()
+            os.remove(tar_file)
+
+
+def bench_startup(sizes: List[int]) -> None:
+    """Report time-to-first-prompt for every supported archive format."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, "config.csv")
+        for entries in sizes:
+            print(f"{entries} entries, time to first prompt:")
+            for archive_format in FORMATS:
+                archive_file = os.path.join(tmp_dir, f"tree.{archive_format}")
+                generate_archive(archive_file, entries, archive_format)
+                with open(config_file, "w") as f:
+                    f.write("user,hostname,tar_file,log_file\n")
+                    f.write(f"bench,localhost,{archive_file},{tmp_dir}/log.xml\n")
+                with open(os.devnull, "w") as devnull:
+                    engine = ShellEngine(config_file, devnull)
+                    engine.write(engine.prompt)
+                    startup_time = engine.startup_time
+                    engine.close()
+                size = os.path.getsize(archive_file) / 2**20
+                print(f"  {archive_format:<8} {startup_time:8.3f}s  ({size:.1f} MiB)")
+                os.remove(archive_file)
+
+
+BENCHMARKS: dict = {
+    "log": lambda args: bench_log(args.actions),
+    "commands": lambda args: bench_commands(args.sizes, args.min_time),
+    "startup": lambda args: bench_startup(args.sizes),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shell emulator benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--actions", type=int, default=100_000)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--min-time", type=float, default=1.0)
+    args = parser.parse_args()
+    run: Callable = BENCHMARKS[args.benchmark]
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
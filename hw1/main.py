@@ -1,21 +1,379 @@
 import tkinter as tk
 from tkinter import scrolledtext, font
-import os
+import argparse
+import bisect
+import fnmatch
+import posixpath
+import queue
+import sys
+import threading
 import tarfile
+import zipfile
 import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
 import xml.etree.ElementTree as ET
-import xml.dom.minidom
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
 
-class ShellEmulator:
-    def __init__(self, root: tk.Tk, config_file: str) -> None:
-        self.root = root
+ArchiveMember = Tuple[str, bool, Any]
+
+
+class TarArchive:
+    """Plain or compressed (gzip, bzip2, xz) tar archive.
+
+    A compressed tar has no index, so listing the members streams through
+    the whole archive once; contents are only read when requested. The
+    decompressor can only move forward: reading a member behind the current
+    position restarts decompression from the start of the archive, so each
+    such read costs O(member offset), not O(member size). ``read_many``
+    therefore reads members in archive order, in one forward pass.
+    """
+
+    def __init__(self, archive_file: str) -> None:
+        self.tar = tarfile.open(archive_file, "r:*")
+
+    def members(self) -> Iterator[ArchiveMember]:
+        for member in self.tar.getmembers():
+            yield member.name, member.isdir(), member
+
+    def read(self, member: tarfile.TarInfo) -> bytes:
+        handle = self.tar.extractfile(member)
+        if handle is None:
+            return b""
+        with handle:
+            return handle.read()
+
+    def read_many(self, members: List[tarfile.TarInfo]) -> List[bytes]:
+        contents: List[bytes] = [b""] * len(members)
+        for index in sorted(range(len(members)), key=lambda i: members[i].offset_data):
+            contents[index] = self.read(members[index])
+        return contents
+
+    def close(self) -> None:
+        self.tar.close()
+
+
+class ZipArchive:
+    """Zip archive read through its central directory.
+
+    Entries are compressed independently, so several of them are
+    decompressed in parallel, each worker thread using its own ZipFile.
+    """
+
+    def __init__(self, archive_file: str, max_workers: Optional[int] = None) -> None:
+        self.archive_file = archive_file
+        self.zip = zipfile.ZipFile(archive_file)
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.local = threading.local()
+        self.worker_handles: List[zipfile.ZipFile] = []
+        self.lock = threading.Lock()
+
+    def members(self) -> Iterator[ArchiveMember]:
+        for info in self.zip.infolist():
+            yield info.filename, info.is_dir(), info
+
+    def read(self, member: zipfile.ZipInfo) -> bytes:
+        return self.zip.read(member)
+
+    def _read_in_worker(self, member: zipfile.ZipInfo) -> bytes:
+        handle = getattr(self.local, "zip", None)
+        if handle is None:
+            handle = self.local.zip = zipfile.ZipFile(self.archive_file)
+            with self.lock:
+                self.worker_handles.append(handle)
+        return handle.read(member)
+
+    def read_many(self, members: List[zipfile.ZipInfo]) -> List[bytes]:
+        if len(members) < 2:
+            return [self.read(member) for member in members]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_workers)
+        return list(self.executor.map(self._read_in_worker, members))
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+        for handle in self.worker_handles:
+            handle.close()
+        self.zip.close()
+
+
+def open_archive(archive_file: str) -> Union[TarArchive, ZipArchive]:
+    if zipfile.is_zipfile(archive_file):
+        return ZipArchive(archive_file)
+    return TarArchive(archive_file)
+
+
+class VirtualNode:
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["VirtualNode"] = None,
+        member: Any = None,
+        is_dir: bool = True,
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.member = member
+        self.is_dir = is_dir
+        self.children: Dict[str, "VirtualNode"] = {}
+
+    @property
+    def path(self) -> str:
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/" + "/".join(reversed(parts))
+
+
+class VirtualFileSystem:
+    """Directory tree built from the archive member table, without extraction.
+
+    The archive stays open so file contents can be read lazily on demand.
+    A name -> nodes index is kept alongside the tree for ``find``.
+    """
+
+    GLOB_CHARS = "*?["
+
+    def __init__(self, archive_file: str) -> None:
+        self.archive = open_archive(archive_file)
+        self.root = VirtualNode("")
+        self.name_index: Dict[str, List[VirtualNode]] = {}
+        self._sorted_names: Optional[List[str]] = None
+        self._sorted_reversed_names: Optional[List[str]] = None
+        for name, is_dir, member in self.archive.members():
+            self.add_member(name, is_dir, member)
+
+    def _index_node(self, node: VirtualNode) -> None:
+        nodes = self.name_index.get(node.name)
+        if nodes is None:
+            self.name_index[node.name] = [node]
+            self._sorted_names = self._sorted_reversed_names = None
+        else:
+            nodes.append(node)
+
+    def _unindex_node(self, node: VirtualNode) -> None:
+        for child in node.children.values():
+            self._unindex_node(child)
+        nodes = self.name_index[node.name]
+        nodes.remove(node)
+        if not nodes:
+            del self.name_index[node.name]
+            self._sorted_names = self._sorted_reversed_names = None
+
+    @property
+    def sorted_names(self) -> List[str]:
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self.name_index)
+        return self._sorted_names
+
+    @property
+    def sorted_reversed_names(self) -> List[str]:
+        """Unique names spelled backwards, sorted: suffixes become prefixes."""
+        if self._sorted_reversed_names is None:
+            self._sorted_reversed_names = sorted(name[::-1] for name in self.name_index)
+        return self._sorted_reversed_names
+
+    @staticmethod
+    def _with_prefix(sorted_names: List[str], prefix: str) -> List[str]:
+        index = bisect.bisect_left(sorted_names, prefix)
+        names = []
+        while index < len(sorted_names) and sorted_names[index].startswith(prefix):
+            names.append(sorted_names[index])
+            index += 1
+        return names
+
+    def add_member(self, name: str, is_dir: bool, member: Any) -> None:
+        path = posixpath.normpath("/" + name)
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            return
+        node = self.root
+        for part in parts[:-1]:
+            child = node.children.get(part)
+            if child is None:
+                child = VirtualNode(part, node)
+                node.children[part] = child
+                self._index_node(child)
+            node = child
+        name = parts[-1]
+        existing = node.children.get(name)
+        if existing is not None and existing.is_dir and is_dir:
+            existing.member = member
+            return
+        if existing is not None:
+            self._unindex_node(existing)
+        child = VirtualNode(name, node, member, is_dir)
+        node.children[name] = child
+        self._index_node(child)
+
+    def resolve(self, cwd: str, path: str) -> Optional[VirtualNode]:
+        full_path = posixpath.normpath(posixpath.join(cwd, path))
+        node = self.root
+        for part in full_path.split("/"):
+            if not part or part == ".":
+                continue
+            if part == "..":
+                node = node.parent or node
+                continue
+            if not node.is_dir or part not in node.children:
+                return None
+            node = node.children[part]
+        return node
+
+    def listdir(self, path: str) -> List[str]:
+        node = self.resolve("/", path)
+        if node is None:
+            raise FileNotFoundError(f"no such file or directory: {path}")
+        if not node.is_dir:
+            raise NotADirectoryError(f"not a directory: {path}")
+        return list(node.children)
+
+    def isdir(self, path: str) -> bool:
+        node = self.resolve("/", path)
+        return node is not None and node.is_dir
+
+    def walk(self, node: VirtualNode, level: int = 0) -> Iterator[Tuple[VirtualNode, int]]:
+        for child in node.children.values():
+            yield child, level
+            if child.is_dir:
+                yield from self.walk(child, level + 1)
+
+    def find(self, node: VirtualNode, pattern: str) -> List[VirtualNode]:
+        """Return nodes under ``node`` whose name matches ``pattern``.
+
+        Exact names are a dict lookup, ``prefix*`` and ``*suffix`` patterns a
+        bisect over the sorted names or the sorted reversed names, other globs
+        are matched against unique names only.
+        """
+        wildcard = [i for i, char in enumerate(pattern) if char in self.GLOB_CHARS]
+        if not wildcard:
+            names = [pattern] if pattern in self.name_index else []
+        elif wildcard == [len(pattern) - 1] and pattern.endswith("*"):
+            names = self._with_prefix(self.sorted_names, pattern[:-1])
+        elif wildcard == [0] and pattern.startswith("*"):
+            names = [
+                name[::-1]
+                for name in self._with_prefix(self.sorted_reversed_names, pattern[:0:-1])
+            ]
+        else:
+            names = fnmatch.filter(self.sorted_names, pattern)
+        found = []
+        for name in names:
+            for candidate in self.name_index[name]:
+                if self._is_descendant(candidate, node):
+                    found.append(candidate)
+        return sorted(found, key=lambda found_node: found_node.path)
+
+    @staticmethod
+    def _is_descendant(node: VirtualNode, ancestor: VirtualNode) -> bool:
+        parent = node.parent
+        while parent is not None:
+            if parent is ancestor:
+                return True
+            parent = parent.parent
+        return False
+
+    def _file_node(self, path: str) -> VirtualNode:
+        node = self.resolve("/", path)
+        if node is None:
+            raise FileNotFoundError(f"no such file or directory: {path}")
+        if node.is_dir:
+            raise IsADirectoryError(f"is a directory: {path}")
+        return node
+
+    def read_file(self, path: str) -> bytes:
+        return self.archive.read(self._file_node(path).member)
+
+    def read_files(self, paths: List[str]) -> List[Union[bytes, OSError]]:
+        """Read several files at once, in parallel where the archive allows.
+
+        Paths that cannot be read get their OSError in place of the contents.
+        """
+        results: List[Union[bytes, OSError]] = []
+        pending: List[int] = []
+        for path in paths:
+            try:
+                node = self._file_node(path)
+            except OSError as e:
+                results.append(e)
+            else:
+                pending.append(len(results))
+                results.append(node.member)
+        contents = self.archive.read_many([results[i] for i in pending])
+        for i, data in zip(pending, contents):
+            results[i] = data
+        return results
+
+    def close(self) -> None:
+        self.archive.close()
+
+
+class XmlLogWriter:
+    """Append-only writer for the <Logs> action log.
+
+    Actions are buffered and appended in batches. After every flush the file
+    ends with the closing tag, so it stays a valid XML document between flushes.
+    """
+
+    HEADER = b'<?xml version="1.0" ?>\n<Logs>\n'
+    FOOTER = b"</Logs>\n"
+
+    def __init__(
+        self, log_file: str, flush_every: int = 64, flush_interval: float = 1.0
+    ) -> None:
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending: List[bytes] = []
+        self.file = open(log_file, "wb")
+        self.file.write(self.HEADER)
+        self.body_end = self.file.tell()
+        self.file.write(self.FOOTER)
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def append(self, attributes: Dict[str, str]) -> None:
+        action = ET.Element("Action", attributes)
+        self.pending.append(b"  " + ET.tostring(action) + b"\n")
+        if (
+            len(self.pending) >= self.flush_every
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            self.file.seek(self.body_end)
+            self.file.write(b"".join(self.pending))
+            self.pending.clear()
+            self.body_end = self.file.tell()
+            self.file.write(self.FOOTER)
+            self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class ShellEngine:
+    """Command interpreter without any GUI, writing output to a text stream."""
+
+    def __init__(self, config_file: str, output: Optional[TextIO] = None) -> None:
+        start = time.perf_counter()
         self.config = self.load_config(config_file)
-        self.cwd = self.extract_tar(self.config["tar_file"])
-        self.create_gui()
+        self.vfs = self.load_archive(self.config["tar_file"])
+        self.cwd = "/"
+        self.output = output if output is not None else sys.stdout
+        self.running = True
         self.load_log()
+        self.startup_time = time.perf_counter() - start
 
     def load_config(self, config_file: str) -> dict:
         config = {}
@@ -25,65 +383,31 @@ class ShellEmulator:
                 config = row
         return config
 
-    def extract_tar(self, tar_file: str) -> str:
-        extracted_dir = "/tmp/shell_emulator"
-        if not os.path.exists(extracted_dir):
-            os.makedirs(extracted_dir)
-        with tarfile.open(tar_file, "r") as tar:
-            tar.extractall(path=extracted_dir)
-        return extracted_dir
+    def load_archive(self, archive_file: str) -> VirtualFileSystem:
+        return VirtualFileSystem(archive_file)
 
     def load_log(self) -> None:
-        if os.path.exists(self.config["log_file"]):
-            os.remove(self.config["log_file"])
-        self.root_log = ET.Element("Logs")
-        self.save_log()
-
-    def save_log(self) -> None:
-        xml_str = ET.tostring(self.root_log, "utf-8")
-        parsed_xml = xml.dom.minidom.parseString(xml_str)
-        pretty_xml_str = parsed_xml.toprettyxml(indent="  ")
-        with open(self.config["log_file"], "w") as log_file:
-            log_file.write(pretty_xml_str)
+        self.log = XmlLogWriter(self.config["log_file"])
 
-    def create_gui(self) -> None:
-        text_font = font.Font(family="Courier", size=12)
-        self.root.title("Shell Emulator")
-        self.root.configure(bg="#2e3b4e")
-        frame = tk.Frame(self.root, bg="#2e3b4e")
-        frame.pack(padx=10, pady=10)
-        self.output_text = scrolledtext.ScrolledText(
-            frame,
-            wrap=tk.WORD,
-            width=80,
-            height=20,
-            font=text_font,
-            bg="#1e1e1e",
-            fg="white",
-            insertbackground="white",
-        )
-        self.output_text.pack()
-        self.input_text = tk.Entry(
-            self.root,
-            width=80,
-            font=text_font,
-            bg="#444444",
-            fg="white",
-            insertbackground="white",
-        )
-        self.input_text.pack(pady=5)
-        self.input_text.bind("<Return>", self.process_command)
-        self.update_prompt()
+    @property
+    def prompt(self) -> str:
+        return f"{self.config['user']}@{self.config['hostname']}:{self.cwd}$ "
 
-    def update_prompt(self) -> None:
-        self.prompt = f"{self.config['user']}@{self.config['hostname']}:{self.cwd}$ "
-        self.output_text.insert(tk.END, self.prompt)
-        self.output_text.yview(tk.END)
+    def write(self, text: str) -> None:
+        self.output.write(text)
 
-    def process_command(self, event: tk.Event) -> None:
-        command = self.input_text.get()
-        self.input_text.delete(0, tk.END)
-        self.execute_command(command)
+    def run_script(self, lines: Iterable[str]) -> int:
+        executed = 0
+        for line in lines:
+            if not self.running:
+                break
+            self.execute_command(line)
+            executed += 1
+        return executed
+
+    def close(self) -> None:
+        self.log.close()
+        self.vfs.close()
 
     def execute_command(self, command: str) -> None:
         args = command.split()
@@ -91,7 +415,7 @@ class ShellEmulator:
             return
         cmd = args[0]
         if cmd == "exit":
-            self.root.quit()
+            self.exit_command()
         elif cmd == "ls":
             self.ls_command()
         elif cmd == "cd":
@@ -102,90 +426,307 @@ class ShellEmulator:
             self.tree_command()
         elif cmd == "find":
             self.find_command(args)
+        elif cmd == "cat":
+            self.cat_command(args)
         elif cmd == "clear":
             self.clear_screen()
         else:
-            self.output_text.insert(tk.END, f"command not found: {cmd}\n")
+            self.write(f"command not found: {cmd}\n")
             self.log_action(cmd, is_error=True)
-        self.update_prompt()
+
+    def exit_command(self) -> None:
+        self.running = False
 
     def ls_command(self) -> None:
         try:
-            files = os.listdir(self.cwd)
+            files = self.vfs.listdir(self.cwd)
             for file in files:
-                self.output_text.insert(tk.END, f"{file}\n")
+                self.write(f"{file}\n")
             self.log_action("ls")
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error: {e}\n")
+            self.write(f"Error: {e}\n")
 
     def cd_command(self, args: List[str]) -> None:
         if len(args) > 1:
             new_dir = args[1]
-            if new_dir == ".." or new_dir == "../":
-                self.cwd = os.path.dirname(self.cwd)
+            node = self.vfs.resolve(self.cwd, new_dir)
+            if node is not None and node.is_dir:
+                self.cwd = node.path
             else:
-                new_path = os.path.join(self.cwd, new_dir)
-                if os.path.isdir(new_path):
-                    self.cwd = new_path
-                else:
-                    self.output_text.insert(
-                        tk.END, f"cd: no such file or directory: {new_dir}\n"
-                    )
+                self.write(f"cd: no such file or directory: {new_dir}\n")
             self.log_action(f"cd {new_dir}")
         else:
-            self.output_text.insert(tk.END, "cd: missing operand\n")
+            self.write("cd: missing operand\n")
 
     def whoami_command(self) -> None:
-        self.output_text.insert(tk.END, f"{self.config['user']}\n")
+        self.write(f"{self.config['user']}\n")
         self.log_action("whoami")
 
     def tree_command(self) -> None:
         self.print_tree(self.cwd)
         self.log_action("tree")
 
-    def print_tree(self, path: str, level: int = 0) -> None:
+    def print_tree(self, path: str) -> None:
         try:
-            for file in os.listdir(path):
-                full_path = os.path.join(path, file)
-                self.output_text.insert(tk.END, " " * level + f"{file}\n")
-                if os.path.isdir(full_path):
-                    self.print_tree(full_path, level + 2)
+            node = self.vfs.resolve("/", path)
+            if node is None:
+                raise FileNotFoundError(f"no such file or directory: {path}")
+            for child, level in self.vfs.walk(node):
+                self.write(" " * (level * 2) + f"{child.name}\n")
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error: {e}\n")
+            self.write(f"Error: {e}\n")
 
     def find_command(self, args: List[str]) -> None:
         if len(args) < 2:
-            self.output_text.insert(tk.END, "find: missing operand\n")
+            self.write("find: missing operand\n")
         else:
             self.find_files(self.cwd, args[1])
             self.log_action(f"find {args[1]}")
 
     def find_files(self, path: str, query: str) -> None:
         try:
-            for file in os.listdir(path):
-                if file == query:
-                    full_path = os.path.join(path, file)
-                    self.output_text.insert(tk.END, f"Found: {full_path}\n")
-                elif os.path.isdir(os.path.join(path, file)):
-                    self.find_files(os.path.join(path, file), query)
+            node = self.vfs.resolve("/", path)
+            if node is None:
+                raise FileNotFoundError(f"no such file or directory: {path}")
+            for found in self.vfs.find(node, query):
+                self.write(f"Found: {found.path}\n")
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error: {e}\n")
+            self.write(f"Error: {e}\n")
+
+    def cat_command(self, args: List[str]) -> None:
+        if len(args) < 2:
+            self.write("cat: missing operand\n")
+            return
+        paths = [posixpath.join(self.cwd, name) for name in args[1:]]
+        for data in self.vfs.read_files(paths):
+            if isinstance(data, OSError):
+                self.write(f"cat: {data}\n")
+                continue
+            text = data.decode("utf-8", errors="replace")
+            if text and not text.endswith("\n"):
+                text += "\n"
+            self.write(text)
+        self.log_action(" ".join(args))
 
     def clear_screen(self) -> None:
-        self.output_text.delete(1.0, tk.END)
         self.log_action("clear")
 
     def log_action(self, command: str, is_error: bool = False) -> None:
-        action = ET.SubElement(self.root_log, "Action")
+        action = {}
         if is_error:
-            action.set("is_error", "true")
-        action.set("user", self.config["user"])
-        action.set("time", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        action.set("command", command)
-        self.save_log()
+            action["is_error"] = "true"
+        action["user"] = self.config["user"]
+        action["time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        action["command"] = command
+        self.log.append(action)
+
+
+class CommandCancelled(BaseException):
+    """Raised inside a running command when the user presses Ctrl+C.
+
+    Derives from BaseException, like KeyboardInterrupt, so the commands'
+    own ``except Exception`` handlers do not swallow it.
+    """
+
+
+COMMAND_DONE = object()
+CLEAR_SCREEN = object()
+EXIT = object()
+MORE = object()
+
+
+class ShellEmulator(ShellEngine):
+    POLL_INTERVAL_MS = 20
+    MAX_BATCH = 2000
+    DEFAULT_SCROLLBACK_LINES = 5000
+    PAGE_LINES = 1000
+
+    def __init__(self, root: tk.Tk, config_file: str) -> None:
+        start = time.perf_counter()
+        self.root = root
+        self.output_queue: "queue.Queue[object]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.more_event = threading.Event()
+        self.worker: Optional[threading.Thread] = None
+        self.lines_on_page = 0
+        self.page_lines = self.PAGE_LINES
+        super().__init__(config_file)
+        self.scrollback_lines = int(
+            self.config.get("scrollback_lines") or self.DEFAULT_SCROLLBACK_LINES
+        )
+        self.create_gui()
+        self.startup_time = time.perf_counter() - start
+
+    def create_gui(self) -> None:
+        text_font = font.Font(family="Courier", size=12)
+        self.root.title("Shell Emulator")
+        self.root.configure(bg="#2e3b4e")
+        frame = tk.Frame(self.root, bg="#2e3b4e")
+        frame.pack(padx=10, pady=10)
+        self.output_text = scrolledtext.ScrolledText(
+            frame,
+            wrap=tk.WORD,
+            width=80,
+            height=20,
+            font=text_font,
+            bg="#1e1e1e",
+            fg="white",
+            insertbackground="white",
+        )
+        self.output_text.pack()
+        self.input_text = tk.Entry(
+            self.root,
+            width=80,
+            font=text_font,
+            bg="#444444",
+            fg="white",
+            insertbackground="white",
+        )
+        self.input_text.pack(pady=5)
+        self.input_text.bind("<Return>", self.process_command)
+        self.input_text.bind("<Control-c>", self.cancel_command)
+        self.root.bind("<Control-c>", self.cancel_command)
+        self.root.protocol("WM_DELETE_WINDOW", self.shutdown)
+        self.update_prompt()
+
+    def update_prompt(self) -> None:
+        self.output_text.insert(tk.END, self.prompt)
+        self.output_text.yview(tk.END)
+
+    def write(self, text: str) -> None:
+        if self.cancel_event.is_set():
+            raise CommandCancelled()
+        self.output_queue.put(text)
+        self.lines_on_page += text.count("\n")
+        if self.lines_on_page >= self.page_lines:
+            self.wait_for_more()
+
+    def wait_for_more(self) -> None:
+        """Block the worker until the user asks for the next page.
+
+        Huge results (tree, find) are produced one page at a time, so neither
+        the queue nor the text widget has to hold the whole output.
+        """
+        self.more_event.clear()
+        self.output_queue.put(MORE)
+        while not self.more_event.wait(0.1):
+            if self.cancel_event.is_set():
+                raise CommandCancelled()
+        self.lines_on_page = 0
+
+    def process_command(self, event: tk.Event) -> None:
+        if self.worker is not None and self.worker.is_alive():
+            self.input_text.delete(0, tk.END)
+            self.more_event.set()
+            return
+        command = self.input_text.get()
+        self.input_text.delete(0, tk.END)
+        self.cancel_event.clear()
+        self.worker = threading.Thread(
+            target=self.run_command, args=(command,), daemon=True
+        )
+        self.worker.start()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_output)
+
+    def run_command(self, command: str) -> None:
+        self.lines_on_page = 0
+        try:
+            self.execute_command(command)
+        except CommandCancelled:
+            self.output_queue.put("^C\n")
+        finally:
+            self.output_queue.put(COMMAND_DONE)
+
+    def cancel_command(self, event: Optional[tk.Event] = None) -> str:
+        if self.worker is not None and self.worker.is_alive():
+            self.cancel_event.set()
+        return "break"
+
+    def poll_output(self) -> None:
+        chunks: List[str] = []
+        done = False
+        for _ in range(self.MAX_BATCH):
+            try:
+                item = self.output_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is COMMAND_DONE:
+                done = True
+                break
+            if item is CLEAR_SCREEN:
+                chunks.clear()
+                self.output_text.delete(1.0, tk.END)
+            elif item is EXIT:
+                self.shutdown()
+                return
+            elif item is MORE:
+                chunks.append("-- More -- (Enter: next page, Ctrl+C: stop)\n")
+            else:
+                chunks.append(item)
+        if chunks:
+            self.output_text.insert(tk.END, "".join(chunks))
+            self.trim_scrollback()
+            self.output_text.yview(tk.END)
+        if done:
+            # The worker has finished, so the Tk thread can flush the log.
+            # Otherwise the last actions of an idle shell would sit in the
+            # buffer until the next command or exit.
+            self.log.flush()
+            self.update_prompt()
+        else:
+            self.root.after(self.POLL_INTERVAL_MS, self.poll_output)
+
+    def trim_scrollback(self) -> None:
+        """Drop the oldest lines once the console exceeds the scrollback limit.
+
+        Trimming waits for a 10% overshoot so lines are deleted in bulk
+        rather than one at a time on every insert.
+        """
+        lines = int(self.output_text.index("end-1c").split(".")[0])
+        if lines > self.scrollback_lines + self.scrollback_lines // 10:
+            self.output_text.delete("1.0", f"{lines - self.scrollback_lines + 1}.0")
+
+    def exit_command(self) -> None:
+        super().exit_command()
+        self.output_queue.put(EXIT)
+
+    def shutdown(self) -> None:
+        if self.worker is not None and self.worker.is_alive():
+            self.cancel_event.set()
+            self.worker.join(timeout=1)
+        self.close()
+        self.root.quit()
+
+    def clear_screen(self) -> None:
+        self.output_queue.put(CLEAR_SCREEN)
+        super().clear_screen()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shell emulator")
+    parser.add_argument("--config", default="config.csv", help="path to config.csv")
+    parser.add_argument(
+        "--batch",
+        metavar="SCRIPT",
+        help="run commands from SCRIPT ('-' for stdin) without the GUI",
+    )
+    args = parser.parse_args()
+    if args.batch is None:
+        root = tk.Tk()
+        ShellEmulator(root, args.config)
+        root.mainloop()
+        return
+    engine = ShellEngine(args.config)
+    try:
+        if args.batch == "-":
+            engine.run_script(sys.stdin)
+        else:
+            with open(args.batch, "r") as script:
+                engine.run_script(script)
+    finally:
+        engine.close()
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    emulator = ShellEmulator(root, "config.csv")
-    root.mainloop()
+    main()
@@ -1,16 +1,19 @@
 import tkinter as tk
-from tkinter import scrolledtext, font
 import unittest
 import os
 import tempfile
 import shutil
-from unittest.mock import patch, MagicMock
-from io import StringIO
-from datetime import datetime
-from main import ShellEmulator
+import fnmatch
+import tarfile
+import zipfile
+from unittest.mock import patch
+from io import BytesIO, StringIO
+import xml.etree.ElementTree as ET
+from main import ShellEngine, ShellEmulator, XmlLogWriter
+
+
+class ArchiveTestCase(unittest.TestCase):
 
-class TestShellEmulator(unittest.TestCase):
-    
     @classmethod
     def setUpClass(cls):
         cls.test_dir = tempfile.mkdtemp()
@@ -19,85 +22,249 @@ class TestShellEmulator(unittest.TestCase):
         os.mkdir(cls.test_subdir)
         with open(cls.test_file, "w") as f:
             f.write("This is a test file.")
-        cls.config = {
-            "user": "testuser",
-            "hostname": "localhost",
-            "tar_file": "",
-            "log_file": "/tmp/test_log.xml"
-        }
+        cls.tar_file = os.path.join(cls.test_dir, "tree.tar")
+        with tarfile.open(cls.tar_file, "w") as tar:
+            tar.add(cls.test_file, arcname="testfile.txt")
+            tar.add(cls.test_subdir, arcname="subdir")
+        cls.log_file = os.path.join(cls.test_dir, "log.xml")
+        cls.config_file = os.path.join(cls.test_dir, "config.csv")
+        with open(cls.config_file, "w") as f:
+            f.write("user,hostname,tar_file,log_file\n")
+            f.write(f"testuser,localhost,{cls.tar_file},{cls.log_file}\n")
 
     @classmethod
     def tearDownClass(cls):
         shutil.rmtree(cls.test_dir)
 
+
+class TestShellEngine(ArchiveTestCase):
+
     def setUp(self):
-        self.root = tk.Tk()
-        self.emulator = ShellEmulator(self.root, "config.csv")
-        self.emulator.cwd = self.test_dir
+        self.output = StringIO()
+        self.engine = ShellEngine(self.config_file, self.output)
 
-    def _force_success(self, mock_insert):
-        mock_insert.reset_mock()
-        mock_insert.return_value = None
-        return mock_insert
+    def tearDown(self):
+        self.engine.close()
 
     def test_ls_success(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.ls_command()
-            mock_insert.assert_any_call(tk.END, "testfile.txt\n")
-            mock_insert.assert_any_call(tk.END, "subdir\n")
+        self.engine.ls_command()
+        self.assertEqual(self.output.getvalue(), "testfile.txt\nsubdir\n")
 
     def test_ls_error(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.ls_command()
+        self.engine.cwd = "/nonexistent"
+        self.engine.ls_command()
+        self.assertIn("Error: no such file or directory", self.output.getvalue())
 
     def test_cd_success(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.cd_command(["cd", "subdir"])
-            self.assertEqual(self.emulator.cwd, self.test_subdir)
+        self.engine.cd_command(["cd", "subdir"])
+        self.assertEqual(self.engine.cwd, "/subdir")
+        self.engine.cd_command(["cd", ".."])
+        self.assertEqual(self.engine.cwd, "/")
 
     def test_cd_error(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.cd_command(["cd", "nonexistent"])
+        self.engine.cd_command(["cd", "nonexistent"])
+        self.assertEqual(self.engine.cwd, "/")
+        self.assertIn(
+            "cd: no such file or directory: nonexistent\n", self.output.getvalue()
+        )
 
     def test_whoami(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.whoami_command()
+        self.engine.whoami_command()
+        self.assertEqual(self.output.getvalue(), "testuser\n")
 
     def test_tree_success(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.tree_command()
-            mock_insert.assert_any_call(tk.END, "testfile.txt\n")
-            mock_insert.assert_any_call(tk.END, "subdir\n")
+        self.engine.tree_command()
+        self.assertIn("testfile.txt\n", self.output.getvalue())
+        self.assertIn("subdir\n", self.output.getvalue())
 
     def test_tree_error(self):
-        os.rmdir(self.test_subdir)
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.tree_command()
-        os.mkdir(self.test_subdir)
+        self.engine.print_tree("/nonexistent")
+        self.assertIn(
+            "Error: no such file or directory: /nonexistent\n", self.output.getvalue()
+        )
 
     def test_find_success(self):
-        with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.find_command(["find", "testfile.txt"])
-            mock_insert.assert_any_call(tk.END, f"Found: {self.test_file}\n")
+        self.engine.find_command(["find", "testfile.txt"])
+        self.assertIn("Found: /testfile.txt\n", self.output.getvalue())
+
+    def test_find_glob(self):
+        self.engine.find_command(["find", "*.txt"])
+        self.assertIn("Found: /testfile.txt\n", self.output.getvalue())
+        self.engine.find_command(["find", "sub*"])
+        self.assertIn("Found: /subdir\n", self.output.getvalue())
+
+    def test_find_suffix_matches_fnmatch(self):
+        vfs = self.engine.vfs
+        root = vfs.root
+        self.assertEqual([n.path for n in vfs.find(root, "*.txt")], ["/testfile.txt"])
+        for name in ("a.log", "subdir/b.log", "subdir/x.logs", "log", "subdir/.log"):
+            vfs.add_member(name, False, None)
+        for pattern in ("*.log", "*log", "*", "*s", "*.txt"):
+            expected = sorted(n.path for n, _ in vfs.walk(root) if fnmatch.fnmatch(n.name, pattern))
+            self.assertEqual([n.path for n in vfs.find(root, pattern)], expected, pattern)
+
+    def test_find_outside_cwd(self):
+        self.engine.cd_command(["cd", "subdir"])
+        self.engine.find_command(["find", "testfile.txt"])
+        self.assertNotIn("Found:", self.output.getvalue())
 
     def test_find_error(self):
+        self.engine.find_command(["find"])
+        self.assertEqual(self.output.getvalue(), "find: missing operand\n")
+
+    def test_cat_success(self):
+        self.engine.cat_command(["cat", "testfile.txt"])
+        self.assertEqual(self.output.getvalue(), "This is a test file.\n")
+
+    def test_cat_error(self):
+        self.engine.cat_command(["cat", "subdir"])
+        self.assertEqual(self.output.getvalue(), "cat: is a directory: /subdir\n")
+
+    def _archive_engine(self, archive_file):
+        config_file = os.path.join(self.test_dir, "archive_config.csv")
+        with open(config_file, "w") as f:
+            f.write("user,hostname,tar_file,log_file\n")
+            f.write(f"testuser,localhost,{archive_file},{self.log_file}\n")
+        engine = ShellEngine(config_file, self.output)
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_compressed_tar(self):
+        archive_file = os.path.join(self.test_dir, "tree.tar.xz")
+        with tarfile.open(archive_file, "w:xz") as tar:
+            tar.add(self.test_file, arcname="testfile.txt")
+            tar.add(self.test_subdir, arcname="subdir")
+        engine = self._archive_engine(archive_file)
+        engine.execute_command("cat testfile.txt")
+        self.assertEqual(self.output.getvalue(), "This is a test file.\n")
+
+    def test_compressed_tar_cat_out_of_order(self):
+        archive_file = os.path.join(self.test_dir, "tree.tar.gz")
+        with tarfile.open(archive_file, "w:gz") as tar:
+            for name, data in (("a.txt", b"first\n"), ("b.txt", b"second\n")):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, BytesIO(data))
+        engine = self._archive_engine(archive_file)
+        engine.execute_command("cat b.txt a.txt b.txt")
+        self.assertEqual(self.output.getvalue(), "second\nfirst\nsecond\n")
+
+    def test_zip_parallel_cat(self):
+        archive_file = os.path.join(self.test_dir, "tree.zip")
+        with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("subdir/", "")
+            archive.writestr("subdir/a.txt", "first")
+            archive.writestr("subdir/b.txt", "second")
+        engine = self._archive_engine(archive_file)
+        engine.execute_command("ls")
+        engine.execute_command("cd subdir")
+        engine.execute_command("cat a.txt missing.txt b.txt")
+        self.assertEqual(
+            self.output.getvalue(),
+            "subdir\nfirst\n"
+            "cat: no such file or directory: /subdir/missing.txt\nsecond\n",
+        )
+
+    def test_unknown_command(self):
+        self.engine.execute_command("unknown")
+        self.assertEqual(self.output.getvalue(), "command not found: unknown\n")
+
+    def test_run_script_stops_at_exit(self):
+        executed = self.engine.run_script(["whoami\n", "exit\n", "ls\n"])
+        self.assertEqual(executed, 2)
+        self.assertEqual(self.output.getvalue(), "testuser\n")
+
+    def test_log_is_valid_xml(self):
+        self.engine.whoami_command()
+        self.engine.execute_command("unknown")
+        self.engine.log.flush()
+        actions = ET.parse(self.log_file).getroot().findall("Action")
+        self.assertEqual([a.get("command") for a in actions], ["whoami", "unknown"])
+        self.assertEqual(actions[1].get("is_error"), "true")
+
+    def test_log_buffers_until_flush(self):
+        log_file = os.path.join(self.test_dir, "buffered.xml")
+        writer = XmlLogWriter(log_file, flush_every=3, flush_interval=3600)
+        writer.append({"command": "ls"})
+        self.assertEqual(len(ET.parse(log_file).getroot()), 0)
+        writer.append({"command": "ls"})
+        writer.append({"command": "tree"})
+        self.assertEqual(len(ET.parse(log_file).getroot()), 3)
+        writer.append({"command": "exit"})
+        writer.close()
+        self.assertEqual(len(ET.parse(log_file).getroot()), 4)
+
+
+class TestShellEmulator(ArchiveTestCase):
+
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            self.skipTest(f"Tk is not available: {e}")
+        self.emulator = ShellEmulator(self.root, self.config_file)
+
+    def tearDown(self):
+        self.emulator.close()
+        self.root.destroy()
+
+    def _output(self, mock_insert):
+        self.emulator.poll_output()
+        return "".join(call.args[1] for call in mock_insert.call_args_list)
+
+    def test_command_runs_on_worker(self):
+        self.emulator.input_text.insert(0, "ls")
         with patch.object(self.emulator.output_text, "insert") as mock_insert:
-            mock_insert = self._force_success(mock_insert)
-            self.emulator.find_command(["find", "nonexistent.txt"])
+            self.emulator.process_command(None)
+            self.emulator.worker.join()
+            output = self._output(mock_insert)
+            self.assertIn("testfile.txt\nsubdir\n", output)
+            self.assertTrue(output.endswith("testuser@localhost:/$ "))
+        actions = ET.parse(self.log_file).getroot().findall("Action")
+        self.assertEqual([a.get("command") for a in actions], ["ls"])
+
+    def test_cancel_command(self):
+        self.emulator.cancel_event.set()
+        with patch.object(self.emulator.output_text, "insert") as mock_insert:
+            self.emulator.run_command("tree")
+            output = self._output(mock_insert)
+            self.assertIn("^C\n", output)
+            self.assertNotIn("testfile.txt", output)
+
+    def _poll_until(self, mock_insert, text):
+        for _ in range(200):
+            output = self._output(mock_insert)
+            if text in output:
+                return output
+            self.emulator.worker.join(0.01)
+        self.fail(f"{text!r} not found in output")
+
+    def test_paged_output(self):
+        self.emulator.page_lines = 1
+        self.emulator.input_text.insert(0, "ls")
+        with patch.object(self.emulator.output_text, "insert") as mock_insert:
+            self.emulator.process_command(None)
+            output = self._poll_until(mock_insert, "-- More --")
+            self.assertIn("testfile.txt\n", output)
+            self.assertNotIn("subdir\n", output)
+            self.emulator.process_command(None)
+            self._poll_until(mock_insert, "subdir\n")
+            self.emulator.cancel_command()
+            self.emulator.worker.join()
+
+    def test_scrollback_trim(self):
+        self.emulator.scrollback_lines = 10
+        self.emulator.output_text.insert(tk.END, "line\n" * 100)
+        self.emulator.trim_scrollback()
+        lines = int(self.emulator.output_text.index("end-1c").split(".")[0])
+        self.assertEqual(lines, 10)
 
     def test_clear(self):
         with patch.object(self.emulator.output_text, "delete") as mock_delete:
-            mock_delete = self._force_success(mock_delete)
             self.emulator.clear_screen()
+            self.emulator.poll_output()
             mock_delete.assert_called_once_with(1.0, tk.END)
 
+
 if __name__ == "__main__":
     unittest.main()
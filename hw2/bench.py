@@ -0,0 +1,52 @@
+import sys
+import time
+from functools import lru_cache
+
+from main import DependencyResolver, build_dependency_graph, generate_mermaid_graph, package_spec
+
+
+def synthetic_registry(layers, width, fanout=4):
+    """Слоистый граф: каждый пакет зависит от fanout пакетов следующего слоя
+    (ромбы) и от пакета первого слоя (цикл)."""
+    registry = {}
+    for layer in range(layers):
+        for index in range(width):
+            dependencies = {}
+            if layer + 1 < layers:
+                for offset in range(fanout):
+                    dependencies[f"p{layer + 1}_{(index + offset) % width}"] = '^1.0.0'
+            dependencies[f"p0_{index}"] = '^1.0.0'
+            registry[package_spec(f"p{layer}_{index}", '^1.0.0')] = dependencies
+    return registry
+
+
+def tree_expansion_edges(registry, roots, max_depth):
+    """Число рёбер, которое вывела бы рекурсивная развёртка без множества посещённых."""
+    @lru_cache(maxsize=None)
+    def count(spec, depth):
+        if depth > max_depth:
+            return 0
+        return sum(1 + count(package_spec(name, version), depth + 1)
+                   for name, version in registry[spec].items())
+
+    return sum(1 + count(package_spec(name, version), 2) for name, version in roots.items())
+
+
+def bench_graph(sizes, layers=6, fanout=4):
+    print(f"{'width':>8} {'nodes':>8} {'edges':>8} {'tree edges':>14} {'bytes':>10} {'seconds':>8} {'us/edge':>8}")
+    for width in sizes:
+        registry = synthetic_registry(layers, width, fanout)
+        roots = {f"p0_{index}": '^1.0.0' for index in range(width)}
+        resolver = DependencyResolver(registry.__getitem__)
+        start = time.perf_counter()
+        graph = build_dependency_graph(roots, 'root', 1, layers + 1, resolver)
+        output = generate_mermaid_graph(graph.to_mermaid())
+        elapsed = time.perf_counter() - start
+        edges = len(graph.edges)
+        print(f"{width:>8} {len(graph.names):>8} {edges:>8} "
+              f"{tree_expansion_edges(registry, roots, layers + 1):>14} "
+              f"{len(output):>10} {elapsed:>8.3f} {elapsed / edges * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    bench_graph([int(size) for size in sys.argv[1:]] or [100, 1000, 10000])
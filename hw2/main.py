@@ -1,18 +1,117 @@
 import subprocess
 import json
 import os
+import glob
+import hashlib
 import yaml
 import sys
+import sqlite3
+import threading
+import time
+import argparse
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor
 
 def load_config(config_path):
     with open(config_path, 'r') as file:
         return yaml.safe_load(file)
 
-def get_package_dependencies(package_name):
+class Profiler:
+    """Замеры для --profile: время этапов, пакетов, подпроцессов и счётчики кэша.
+
+    Этапы вкладываются друг в друга и накапливаются по полному пути вида
+    "graph;resolve" (формат свёрнутых стеков flame graph). Таймеры и
+    счётчики обновляются из потоков пула, поэтому защищены блокировкой.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.stages = {}
+        self.packages = {}
+        self.timers = {}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        self.stack.append(name)
+        path = ';'.join(self.stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[path] = self.stages.get(path, 0.0) + time.perf_counter() - start
+            self.stack.pop()
+
+    def timer(self, name, seconds):
+        with self.lock:
+            total, calls = self.timers.get(name, (0.0, 0))
+            self.timers[name] = (total + seconds, calls + 1)
+
+    def package(self, spec, seconds):
+        with self.lock:
+            self.packages[spec] = self.packages.get(spec, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def self_time(self, path):
+        prefix = path + ';'
+        children = sum(seconds for child, seconds in self.stages.items()
+                       if child.startswith(prefix) and ';' not in child[len(prefix):])
+        return self.stages[path] - children
+
+    def report(self):
+        return {
+            'stages': [
+                {'stage': path, 'seconds': seconds, 'self_seconds': self.self_time(path)}
+                for path, seconds in sorted(self.stages.items(), key=lambda item: item[0].split(';'))
+            ],
+            'timers': {name: {'calls': calls, 'seconds': total}
+                       for name, (total, calls) in sorted(self.timers.items())},
+            'packages': [
+                {'package': spec, 'seconds': seconds}
+                for spec, seconds in sorted(self.packages.items(), key=lambda item: -item[1])
+            ],
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def summary(self, width=40, top=10):
+        """Текстовая сводка: дерево этапов с полосами пропорционально времени
+        и самые медленные пакеты."""
+        total = sum(seconds for path, seconds in self.stages.items() if ';' not in path) or 1.0
+        lines = []
+        for path, seconds in sorted(self.stages.items(), key=lambda item: item[0].split(';')):
+            names = path.split(';')
+            label = '  ' * (len(names) - 1) + names[-1]
+            bar = '#' * round(width * seconds / total)
+            lines.append(f"{label:<24} {seconds:9.3f}s {100 * seconds / total:5.1f}% {bar}")
+        for name, (seconds, calls) in sorted(self.timers.items()):
+            lines.append(f"{name:<24} {seconds:9.3f}s  вызовов: {calls}")
+        if self.packages:
+            lines.append("самые медленные пакеты:")
+        for spec, seconds in sorted(self.packages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {spec:<38} {seconds:9.3f}s")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24} {value}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2, ensure_ascii=False)
+
+def get_package_dependencies(package_name, profiler=None):
+    start = time.perf_counter()
     result = subprocess.run(
         ['npm', 'show', package_name, 'dependencies', '--json'],
         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
     )
+    if profiler is not None:
+        profiler.timer('subprocess npm show', time.perf_counter() - start)
     
     if result.returncode != 0:
         raise Exception(f"Ошибка при получении зависимостей: {result.stderr}")
@@ -20,24 +119,546 @@ def get_package_dependencies(package_name):
     if not result.stdout.strip():
         return {}
     
+    start = time.perf_counter()
     try:
-        return json.loads(result.stdout)
+        dependencies = json.loads(result.stdout)
     except json.JSONDecodeError:
         raise Exception(f"Ошибка при парсинге JSON для зависимостей {package_name}: {result.stdout}")
+    if profiler is not None:
+        profiler.timer('json parse', time.perf_counter() - start)
+
+    # Для диапазона версий npm возвращает список по одной записи на версию,
+    # последняя соответствует самой новой подходящей версии.
+    if isinstance(dependencies, list):
+        dependencies = dependencies[-1] if dependencies else {}
+    return dependencies or {}
+
+def package_spec(package_name, version):
+    return f"{package_name}@{version}"
+
+class MetadataCache:
+    """Постоянный кэш результатов get_package_dependencies в SQLite.
+
+    Записи старше ttl секунд считаются устаревшими (кроме офлайн-режима),
+    при превышении max_entries удаляются давно не использованные записи.
+    """
+
+    def __init__(self, path, ttl=86400, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS dependencies ('
+            'spec TEXT PRIMARY KEY, data TEXT NOT NULL, '
+            'fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self.connection.commit()
+
+    def get(self, spec, allow_stale=False):
+        row = self.connection.execute(
+            'SELECT data, fetched_at FROM dependencies WHERE spec = ?', (spec,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if not allow_stale and now - row[1] > self.ttl:
+            return None
+        self.connection.execute(
+            'UPDATE dependencies SET accessed_at = ? WHERE spec = ?', (now, spec)
+        )
+        return json.loads(row[0])
+
+    def put_many(self, items):
+        now = time.time()
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO dependencies VALUES (?, ?, ?, ?)',
+            [(spec, json.dumps(data), now, now) for spec, data in items]
+        )
+        self.evict()
+
+    def evict(self):
+        self.connection.execute(
+            'DELETE FROM dependencies WHERE spec NOT IN ('
+            'SELECT spec FROM dependencies ORDER BY accessed_at DESC LIMIT ?)',
+            (self.max_entries,)
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+class DependencyResolver:
+    """Кэширующий загрузчик зависимостей.
+
+    Каждый спецификатор name@range запрашивается не больше одного раза,
+    недостающие спецификаторы загружаются параллельно пулом потоков.
+    Если задан постоянный кэш, сначала проверяется он; в офлайн-режиме
+    npm не вызывается вовсе. Попадания и промахи кэшей и время загрузки
+    каждого пакета записываются в profiler.
+    """
+
+    exact_versions = False
+
+    def __init__(self, fetch=None, max_workers=8, cache=None, offline=False, profiler=None):
+        if fetch is None:
+            fetch = get_package_dependencies if profiler is None else partial(get_package_dependencies, profiler=profiler)
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.persistent_cache = cache
+        self.offline = offline
+        self.profiler = profiler or Profiler()
+        self.cache = {}
+        self.requests = 0
+        self.requested = set()
+
+    def timed_fetch(self, spec):
+        start = time.perf_counter()
+        try:
+            return self.fetch(spec)
+        finally:
+            self.profiler.package(spec, time.perf_counter() - start)
+
+    def prefetch(self, specs):
+        with self.profiler.stage('resolve'):
+            self.load(specs)
+
+    def load(self, specs):
+        unique = list(dict.fromkeys(specs))
+        missing = [spec for spec in unique if spec not in self.cache]
+        self.profiler.count('memory cache hits', len(unique) - len(missing))
+        self.profiler.count('memory cache misses', len(missing))
+        if self.persistent_cache is not None and missing:
+            not_cached = []
+            for spec in missing:
+                dependencies = self.persistent_cache.get(spec, allow_stale=self.offline)
+                if dependencies is None:
+                    not_cached.append(spec)
+                else:
+                    self.cache[spec] = dependencies
+            self.profiler.count('sqlite cache hits', len(missing) - len(not_cached))
+            self.profiler.count('sqlite cache misses', len(not_cached))
+            missing = not_cached
+        if not missing:
+            return
+        if self.offline:
+            raise Exception(f"Нет данных в кэше для {missing[0]} (офлайн-режим)")
+        self.profiler.count('fetches', len(missing))
+        if len(missing) == 1:
+            fetched = [self.timed_fetch(missing[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                fetched = list(executor.map(self.timed_fetch, missing))
+        self.cache.update(zip(missing, fetched))
+        if self.persistent_cache is not None:
+            self.persistent_cache.put_many(zip(missing, fetched))
+
+    def resolve(self, spec):
+        self.requests += 1
+        self.requested.add(spec)
+        if spec not in self.cache:
+            self.prefetch([spec])
+        return self.cache[spec]
+
+def lockfile_v1_packages(dependencies, prefix=''):
+    """Переводит дерево dependencies из lock-файла v1 в плоский формат v2."""
+    packages = {}
+    for name, entry in dependencies.items():
+        path = f"{prefix}node_modules/{name}"
+        packages[path] = {
+            'version': entry.get('version'),
+            'dependencies': entry.get('requires', {})
+        }
+        packages.update(lockfile_v1_packages(entry.get('dependencies', {}), path + '/'))
+    return packages
+
+def load_lockfile(lockfile_path):
+    with open(lockfile_path, 'r') as file:
+        lockfile = json.load(file)
+    if 'packages' in lockfile:
+        packages = lockfile['packages']
+    else:
+        packages = lockfile_v1_packages(lockfile.get('dependencies', {}))
+        manifest_path = os.path.join(os.path.dirname(lockfile_path), 'package.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as file:
+                packages[''] = json.load(file)
+        else:
+            packages[''] = {'dependencies': {path[len('node_modules/'):]: ''
+                                             for path in packages if path.count('node_modules/') == 1}}
+    packages.setdefault('', {}).setdefault('name', lockfile.get('name'))
+    return packages
+
+def scan_node_modules(project_dir):
+    """Собирает пакеты из node_modules/*/package.json в формате lock-файла v2."""
+    packages = {}
+    manifest_path = os.path.join(project_dir, 'package.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as file:
+            packages[''] = json.load(file)
+    packages.setdefault('', {}).setdefault('name', os.path.basename(os.path.abspath(project_dir)))
+
+    def scan(modules_dir, prefix):
+        if not os.path.isdir(modules_dir):
+            return
+        for entry in sorted(os.listdir(modules_dir)):
+            if entry.startswith('.'):
+                continue
+            if entry.startswith('@'):
+                names = [f"{entry}/{scoped}" for scoped in sorted(os.listdir(os.path.join(modules_dir, entry)))]
+            else:
+                names = [entry]
+            for name in names:
+                package_dir = os.path.join(modules_dir, name)
+                manifest_path = os.path.join(package_dir, 'package.json')
+                if not os.path.exists(manifest_path):
+                    continue
+                with open(manifest_path, 'r') as file:
+                    manifest = json.load(file)
+                path = f"{prefix}node_modules/{name}"
+                packages[path] = manifest
+                scan(os.path.join(package_dir, 'node_modules'), path + '/')
+
+    scan(os.path.join(project_dir, 'node_modules'), '')
+    return packages
+
+def locate_package(packages, path, name):
+    """Ищет установленный пакет так же, как require() в Node.js: от
+    вложенного node_modules вверх к корню проекта."""
+    base = path
+    while True:
+        candidate = f"{base}/node_modules/{name}" if base else f"node_modules/{name}"
+        if candidate in packages:
+            return candidate
+        if not base:
+            return None
+        index = base.rfind('/node_modules/')
+        base = base[:index] if index != -1 else ''
+
+def follow_link(packages, path):
+    """Путь к самому пакету: ссылка рабочей области (link) ведёт в resolved."""
+    entry = packages[path]
+    if entry.get('link') and entry.get('resolved') in packages:
+        return entry['resolved']
+    return path
+
+class LockfileResolver(DependencyResolver):
+    """Резолвер по package-lock.json или node_modules без запуска npm.
+
+    Весь граф строится за один проход по описаниям пакетов; зависимости
+    возвращаются с точными установленными версиями. Разные копии одного
+    name@version считаются одним пакетом.
+    """
+
+    exact_versions = True
+
+    def __init__(self, packages, profiler=None, project_dir='.'):
+        super().__init__(profiler=profiler)
+        self.packages = packages
+        self.project_dir = project_dir
+        root = packages.get('', {})
+        if root.get('name'):
+            self.cache[root['name']] = self.installed_dependencies('', root)
+        for path in packages:
+            # Каталоги рабочих областей достижимы через ссылки в node_modules.
+            if 'node_modules/' not in path:
+                continue
+            target = follow_link(packages, path)
+            entry = packages[target]
+            dependencies = self.installed_dependencies(target, entry)
+            # Ключ — имя в node_modules, а не entry['name']: для псевдонима
+            # "foo": "npm:bar@^1" зависимые пакеты ищут foo, а не bar.
+            name = path[path.rfind('node_modules/') + len('node_modules/'):]
+            self.cache.setdefault(package_spec(name, entry.get('version', '')), dependencies)
+            if path.startswith('node_modules/') and path.count('node_modules/') == 1:
+                self.cache.setdefault(name, dependencies)
+
+    def installed_dependencies(self, path, manifest):
+        """Зависимости манифеста из каталога path с установленными версиями
+        вместо диапазонов; неустановленные пакеты пропускаются."""
+        declared = dict(manifest.get('dependencies') or {})
+        declared.update(manifest.get('optionalDependencies') or {})
+        dependencies = {}
+        for name in declared:
+            location = locate_package(self.packages, path, name)
+            if location is not None:
+                dependencies[name] = self.packages[follow_link(self.packages, location)].get('version', '')
+        return dependencies
+
+    def manifest_dependencies(self, manifest_path, manifest):
+        """Зависимости package.json из любого каталога проекта (например,
+        пакета рабочей области): поиск идёт от каталога манифеста."""
+        path = os.path.relpath(os.path.dirname(os.path.abspath(manifest_path)), os.path.abspath(self.project_dir))
+        path = '' if path == os.curdir else path.replace(os.sep, '/')
+        return self.installed_dependencies(path, manifest)
+
+    def load(self, specs):
+        for spec in specs:
+            if spec not in self.cache:
+                raise Exception(f"Пакет {spec} не найден среди установленных пакетов")
+        self.profiler.count('memory cache hits', len(specs))
+
+class DependencyGraph:
+    """Граф зависимостей в виде списков смежности.
+
+    Имена пакетов интернируются в целочисленные идентификаторы, повторные
+    рёбра между одной парой узлов отбрасываются.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.adjacency = []
+        self.edges = set()
+
+    def node(self, name):
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.adjacency.append([])
+        return node_id
+
+    def add_edge(self, source, target, version):
+        if (source, target) in self.edges:
+            return False
+        self.edges.add((source, target))
+        self.adjacency[source].append((target, version))
+        return True
+
+    def iter_edges(self):
+        for source, targets in enumerate(self.adjacency):
+            for target, version in targets:
+                yield source, target, version
+
+    def to_mermaid(self):
+        lines = [f'  n{node_id}["{mermaid_escape(name)}"]\n' for node_id, name in enumerate(self.names)]
+        lines.extend(
+            f'  n{source} -->|"{mermaid_escape(version)}"| n{target}\n'
+            for source, target, version in self.iter_edges()
+        )
+        return "".join(lines)
+
+def mermaid_escape(text):
+    return str(text).replace('"', '#quot;')
+
+class GraphExporter:
+    """Потоковый экспорт графа: узлы и рёбра пишутся в файл по мере обхода."""
+
+    extension = ''
+
+    def __init__(self, file):
+        self.file = file
+        self.declared = set()
+
+    def start(self, graph, roots):
+        pass
+
+    def edge(self, graph, source, target, version):
+        pass
+
+    def finish(self):
+        pass
+
+class MermaidExporter(GraphExporter):
+    extension = 'mmd'
+
+    def node(self, graph, node_id):
+        if node_id in self.declared:
+            return f"n{node_id}"
+        self.declared.add(node_id)
+        return f'n{node_id}["{mermaid_escape(graph.names[node_id])}"]'
+
+    def start(self, graph, roots):
+        self.file.write("graph TD\n")
+        for root in roots:
+            self.file.write(f"  {self.node(graph, root)}\n")
+
+    def edge(self, graph, source, target, version):
+        self.file.write(
+            f'  {self.node(graph, source)} -->|"{mermaid_escape(version)}"| {self.node(graph, target)}\n'
+        )
+
+class DotExporter(GraphExporter):
+    extension = 'dot'
 
-def parse_dependencies(dependencies, package_name, depth, max_depth):
+    def node(self, graph, node_id):
+        if node_id not in self.declared:
+            self.declared.add(node_id)
+            self.file.write(f"  n{node_id} [label={dot_quote(graph.names[node_id])}];\n")
+
+    def start(self, graph, roots):
+        self.file.write("digraph dependencies {\n")
+        for root in roots:
+            self.node(graph, root)
+
+    def edge(self, graph, source, target, version):
+        self.node(graph, target)
+        self.file.write(f"  n{source} -> n{target} [label={dot_quote(version)}];\n")
+
+    def finish(self):
+        self.file.write("}\n")
+
+class JsonExporter(GraphExporter):
+    """Корни и списки смежности {"пакет": {"зависимость": "версия"}}.
+
+    Рёбра одного узла появляются при обходе подряд, поэтому объект узла
+    можно закрыть, как только начинаются рёбра следующего.
+    """
+
+    extension = 'json'
+
+    def start(self, graph, roots):
+        self.current = None
+        root_names = json.dumps([graph.names[root] for root in roots])
+        self.file.write(f'{{"roots": {root_names}, "dependencies": {{')
+
+    def edge(self, graph, source, target, version):
+        if source != self.current:
+            if self.current is not None:
+                self.file.write('}, ')
+            self.current = source
+            self.file.write(f'{json.dumps(graph.names[source])}: {{')
+        else:
+            self.file.write(', ')
+        self.file.write(f'{json.dumps(graph.names[target])}: {json.dumps(version)}')
+
+    def finish(self):
+        if self.current is not None:
+            self.file.write('}')
+        self.file.write('}}\n')
+
+class GraphMLExporter(GraphExporter):
+    extension = 'graphml'
+
+    def node(self, graph, node_id):
+        if node_id not in self.declared:
+            self.declared.add(node_id)
+            self.file.write(
+                f'    <node id="n{node_id}"><data key="name">{escape(graph.names[node_id])}</data></node>\n'
+            )
+
+    def start(self, graph, roots):
+        self.file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '  <key id="name" for="node" attr.name="name" attr.type="string"/>\n'
+            '  <key id="version" for="edge" attr.name="version" attr.type="string"/>\n'
+            '  <graph id="dependencies" edgedefault="directed">\n'
+        )
+        for root in roots:
+            self.node(graph, root)
+
+    def edge(self, graph, source, target, version):
+        self.node(graph, target)
+        self.file.write(
+            f'    <edge source="n{source}" target="n{target}">'
+            f'<data key="version">{escape(str(version))}</data></edge>\n'
+        )
+
+    def finish(self):
+        self.file.write('  </graph>\n</graphml>\n')
+
+EXPORTERS = {
+    'mermaid': MermaidExporter,
+    'dot': DotExporter,
+    'json': JsonExporter,
+    'graphml': GraphMLExporter,
+}
+
+def export_graph(graph, roots, exporter):
+    exporter.start(graph, roots)
+    for source, target, version in graph.iter_edges():
+        exporter.edge(graph, source, target, version)
+    exporter.finish()
+
+def merge_graphs(graphs):
+    merged = DependencyGraph()
+    for graph in graphs:
+        for source, target, version in graph.iter_edges():
+            merged.add_edge(merged.node(graph.names[source]), merged.node(graph.names[target]), version)
+    return merged
+
+def dot_quote(text):
+    return json.dumps(str(text), ensure_ascii=False)
+
+def build_dependency_graph(dependencies, package_name, depth, max_depth, resolver=None, exporter=None):
+    """Обходит зависимости в ширину, раскрывая каждый пакет один раз.
+
+    Множество посещённых узлов защищает от циклов, а зависимости очередного
+    уровня загружаются через resolver одним параллельным пакетом. Узлом
+    считается имя пакета, а для резолверов с точными версиями — name@version.
+    Если передан exporter, каждое новое ребро сразу пишется в его файл.
+    """
+    exporters = None if exporter is None else [exporter]
+    return build_dependency_graphs([(package_name, dependencies)], depth, max_depth, resolver, exporters)[0]
+
+def build_dependency_graphs(roots, depth, max_depth, resolver=None, exporters=None):
+    """Строит графы нескольких корней (имя, зависимости) одним обходом в ширину.
+
+    Каждый корень получает свой граф, но уровни всех корней идут вместе,
+    поэтому зависимости очередного уровня загружаются одним параллельным
+    пакетом на все корни сразу. exporters — по экспортёру на корень или None.
+    """
+    if resolver is None:
+        resolver = DependencyResolver()
+    graphs = []
+    visited = []
+    levels = []
+    for index, (package_name, dependencies) in enumerate(roots):
+        graph = DependencyGraph()
+        root = graph.node(package_name)
+        if exporters is not None:
+            exporters[index].start(graph, [root])
+        graphs.append(graph)
+        visited.append({root})
+        levels.append([(root, dependencies)])
+    while any(levels) and depth <= max_depth:
+        next_levels = []
+        for index, graph in enumerate(graphs):
+            exporter = exporters[index] if exporters is not None else None
+            next_level = []
+            for source, source_dependencies in levels[index]:
+                for name, version in source_dependencies.items():
+                    spec = package_spec(name, version)
+                    target = graph.node(spec if resolver.exact_versions else name)
+                    if graph.add_edge(source, target, version) and exporter is not None:
+                        exporter.edge(graph, source, target, version)
+                    if target not in visited[index]:
+                        visited[index].add(target)
+                        next_level.append((target, spec))
+            next_levels.append(next_level)
+        depth += 1
+        if depth > max_depth:
+            break
+        resolver.prefetch([spec for next_level in next_levels for _, spec in next_level])
+        levels = [[(node, resolver.resolve(spec)) for node, spec in next_level] for next_level in next_levels]
+    if exporters is not None:
+        for exporter in exporters:
+            exporter.finish()
+    return graphs
+
+def create_resolver(config, profiler=None):
+    backend = config.get('resolver', 'npm')
+    if backend == 'lockfile':
+        lockfile_path = config.get('lockfile_path', 'package-lock.json')
+        return LockfileResolver(load_lockfile(lockfile_path), profiler, os.path.dirname(lockfile_path) or '.')
+    if backend == 'node_modules':
+        project_dir = config.get('project_dir', '.')
+        return LockfileResolver(scan_node_modules(project_dir), profiler, project_dir)
+    cache = None
+    if config.get('cache_path'):
+        cache = MetadataCache(
+            config['cache_path'],
+            ttl=config.get('cache_ttl', 86400),
+            max_entries=config.get('cache_max_entries', 10000)
+        )
+    return DependencyResolver(cache=cache, offline=config.get('offline', False), profiler=profiler)
+
+def parse_dependencies(dependencies, package_name, depth, max_depth, resolver=None):
     if depth > max_depth:
         return ""
-    
-    graph = ""
-    for dep, version in dependencies.items():
-        dep_name = dep
-        dep_version = version
-        graph += f"  {package_name} --> {dep_name}({dep_version})\n"
-        nested_deps = get_package_dependencies(dep_name)
-        graph += parse_dependencies(nested_deps, dep_name, depth + 1, max_depth)
-    
-    return graph
+    return build_dependency_graph(dependencies, package_name, depth, max_depth, resolver).to_mermaid()
 
 def generate_mermaid_graph(dependencies_graph):
     return f"graph TD\n{dependencies_graph}"
@@ -47,24 +668,213 @@ def save_graph_to_file(graph, file_path):
         file.write(graph)
 
 def generate_graph_image(input_file, output_file, visualizer_path):
-    subprocess.run([visualizer_path, '-i', input_file, '-o', output_file])
+    result = subprocess.run([visualizer_path, '-i', input_file, '-o', output_file])
+    if result.returncode != 0:
+        raise Exception(f"Ошибка при отрисовке графа {input_file}: код возврата {result.returncode}")
+
+def visualize_single(config, resolver, exporter_class, output_path):
+    data = resolver.resolve(config['package_name'])
 
-def visualize_dependencies():
-    config = load_config('config.yaml')
-    
-    data = get_package_dependencies(config['package_name'])
-    
     if not data:
         print(f"Нет зависимостей для пакета {config['package_name']}")
-        return
-    
-    dependencies_graph = parse_dependencies(data, config['package_name'], 1, config['max_depth'])
-    mermaid_graph = generate_mermaid_graph(dependencies_graph)
-    
-    temp_file_path = 'temp.mmd'
-    save_graph_to_file(mermaid_graph, temp_file_path)
-    
-    generate_graph_image(temp_file_path, config['output_image_path'], config['visualizer_path'])
+        return False
+
+    with open(output_path, 'w') as file:
+        build_dependency_graph(data, config['package_name'], 1, config['max_depth'],
+                               resolver, exporter_class(file))
+    return True
+
+def input_fingerprint(config):
+    """Отпечаток входных данных; известен только для резолвера по lock-файлу,
+    так как ответы npm могут измениться без изменения локальных файлов."""
+    if config.get('resolver', 'npm') != 'lockfile':
+        return None
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode())
+    with open(config.get('lockfile_path', 'package-lock.json'), 'rb') as file:
+        digest.update(file.read())
+    return digest.hexdigest()
+
+def load_graph_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r') as file:
+        return json.load(file)
+
+def save_graph_state(state_path, state):
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_path, state_path)
+
+def renders_image(config):
+    """Отрисовка через mmdc требует браузера и нужна не всегда."""
+    return config.get('output_format', 'mermaid') == 'mermaid' and config.get('render', True)
+
+def visualize_incremental(config, resolver, exporter_class, output_path):
+    """Перестраивает граф с учётом результата прошлого запуска.
+
+    Если lock-файл и настройки не менялись, граф не строится вовсе. Иначе
+    разрешения прошлого запуска (пока не истёк cache_ttl) переиспользуются,
+    так что заново запрашиваются только изменившиеся поддеревья, а файл и
+    изображение обновляются, только если изменился набор рёбер. Формат и
+    пути вывода тоже сохраняются: если они изменились или файл либо
+    изображение пропали, граф выгружается и отрисовывается заново.
+
+    Если граф выгружен, возвращается новое состояние: вызывающий сохраняет
+    его только после успешной отрисовки, иначе следующий запуск принял бы
+    недописанный граф или старое изображение за актуальные. Если выгружать
+    нечего, состояние сохраняется сразу и возвращается None.
+    """
+    state_path = config['state_path']
+    state = load_graph_state(state_path)
+    fingerprint = input_fingerprint(config)
+    outputs = {
+        'output_format': config.get('output_format', 'mermaid'),
+        'output_path': output_path,
+        'output_image_path': config.get('output_image_path'),
+    }
+    outputs_current = state.get('outputs') == outputs and os.path.exists(output_path) and (
+        not renders_image(config) or os.path.exists(config['output_image_path']))
+    if fingerprint is not None and state.get('fingerprint') == fingerprint and outputs_current:
+        print("Входные данные не изменились, граф не перестраивается")
+        return None
+
+    if not resolver.exact_versions and time.time() - state.get('saved_at', 0) <= config.get('cache_ttl', 86400):
+        for spec, dependencies in state.get('resolutions', {}).items():
+            resolver.cache.setdefault(spec, dependencies)
+
+    package_name = config['package_name']
+    data = resolver.resolve(package_name)
+    if not data:
+        print(f"Нет зависимостей для пакета {package_name}")
+        return None
+
+    graph = build_dependency_graph(data, package_name, 1, config['max_depth'], resolver)
+    edges = [[graph.names[source], graph.names[target], version]
+             for source, target, version in graph.iter_edges()]
+    previous = set(map(tuple, state.get('edges', [])))
+    current = set(map(tuple, edges))
+    added = current - previous
+    removed = previous - current
+
+    resolutions = {} if resolver.exact_versions else {spec: resolver.cache[spec] for spec in resolver.requested}
+    new_state = {
+        'fingerprint': fingerprint,
+        'saved_at': time.time(),
+        'resolutions': resolutions,
+        'edges': edges,
+        'outputs': outputs,
+    }
+
+    if not added and not removed and outputs_current:
+        save_graph_state(state_path, new_state)
+        print("Граф не изменился, перерисовка пропущена")
+        return None
+
+    with open(output_path, 'w') as file:
+        export_graph(graph, [graph.ids[package_name]], exporter_class(file))
+    print(f"Граф обновлён: добавлено рёбер {len(added)}, удалено {len(removed)}")
+    return new_state
+
+def load_roots(config, resolver):
+    """Корневые пакеты пакетного режима: имена из package_names и
+    манифесты, найденные по шаблону package_json_glob. Для резолверов с
+    точными версиями диапазоны из манифестов заменяются установленными
+    версиями."""
+    roots = []
+    package_names = config.get('package_names') or []
+    resolver.prefetch(package_names)
+    for package_name in package_names:
+        roots.append((package_name, resolver.resolve(package_name)))
+    if config.get('package_json_glob'):
+        for manifest_path in sorted(glob.glob(config['package_json_glob'], recursive=True)):
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+            name = manifest.get('name') or os.path.basename(os.path.dirname(os.path.abspath(manifest_path)))
+            if resolver.exact_versions:
+                roots.append((name, resolver.manifest_dependencies(manifest_path, manifest)))
+            else:
+                roots.append((name, manifest.get('dependencies') or {}))
+    return roots
+
+def visualize_many(config, resolver, exporter_class):
+    output_dir = config.get('output_dir', '.')
+    os.makedirs(output_dir, exist_ok=True)
+    roots = load_roots(config, resolver)
+    # Графы строятся вместе, чтобы уровни всех корней загружались общими
+    # пакетами, и выгружаются после обхода: держать открытыми сотни файлов
+    # на время обхода незачем.
+    graphs = build_dependency_graphs(roots, 1, config['max_depth'], resolver)
+    for (name, _), graph in zip(roots, graphs):
+        file_name = name.replace('/', '__')
+        with open(os.path.join(output_dir, f"{file_name}.{exporter_class.extension}"), 'w') as file:
+            export_graph(graph, [graph.ids[name]], exporter_class(file))
+
+    merged = merge_graphs(graphs)
+    for name, _ in roots:
+        merged.node(name)
+    merged_path = os.path.join(output_dir, f"merged.{exporter_class.extension}")
+    with open(merged_path, 'w') as file:
+        export_graph(merged, [merged.ids[name] for name, _ in roots], exporter_class(file))
+
+    unique = len(resolver.requested)
+    print(f"Корневых пакетов: {len(roots)}, запросов зависимостей: {resolver.requests}, "
+          f"уникальных: {unique}, сэкономлено благодаря общему кэшу: {resolver.requests - unique}")
+    return merged_path
+
+def visualize_dependencies(profile_path=None):
+    """Строит граф по config.yaml. Если задан profile_path, замеры этапов,
+    пакетов, подпроцессов и кэша сохраняются в этот JSON-файл, а в консоль
+    выводится их сводка."""
+    if profile_path is None:
+        return run_visualization(None)
+    profiler = Profiler()
+    try:
+        with profiler.stage('total'):
+            run_visualization(profiler)
+    finally:
+        profiler.save(profile_path)
+        print(profiler.summary())
+
+def run_visualization(profiler):
+    stage = profiler.stage if profiler is not None else lambda name: nullcontext()
+    with stage('config'):
+        config = load_config('config.yaml')
+        resolver = create_resolver(config, profiler)
+    output_format = config.get('output_format', 'mermaid')
+    if output_format not in EXPORTERS:
+        raise Exception(f"Неизвестный формат вывода: {output_format}")
+    exporter_class = EXPORTERS[output_format]
+    output_path = config.get('output_path') or (
+        'temp.mmd' if output_format == 'mermaid' else f"graph.{exporter_class.extension}"
+    )
+
+    state = None
+    try:
+        with stage('graph'):
+            if config.get('package_names') or config.get('package_json_glob'):
+                output_path = visualize_many(config, resolver, exporter_class)
+            elif config.get('state_path'):
+                state = visualize_incremental(config, resolver, exporter_class, output_path)
+                if state is None:
+                    return
+            elif not visualize_single(config, resolver, exporter_class, output_path):
+                return
+    finally:
+        if resolver.persistent_cache is not None:
+            resolver.persistent_cache.close()
+
+    if renders_image(config):
+        with stage('render'):
+            start = time.perf_counter()
+            generate_graph_image(output_path, config['output_image_path'], config['visualizer_path'])
+            resolver.profiler.timer('subprocess mmdc', time.perf_counter() - start)
+    if state is not None:
+        save_graph_state(config['state_path'], state)
 
 if __name__ == "__main__":
-    visualize_dependencies()
+    parser = argparse.ArgumentParser(description="Визуализация графа зависимостей npm")
+    parser.add_argument('--profile', nargs='?', const='profile.json', metavar='ПУТЬ',
+                        help="сохранить замеры в JSON (по умолчанию profile.json) и вывести сводку")
+    args = parser.parse_args()
+    visualize_dependencies(args.profile)
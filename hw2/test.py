@@ -1,9 +1,16 @@
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import call, patch, mock_open
 import subprocess
 import json
 import yaml
-from main import load_config, get_package_dependencies, parse_dependencies, generate_mermaid_graph, save_graph_to_file, generate_graph_image, visualize_dependencies
+import threading
+import io
+import os
+import xml.etree.ElementTree as ET
+import sys
+import tempfile
+import shutil
+from main import load_config, get_package_dependencies, parse_dependencies, generate_mermaid_graph, save_graph_to_file, generate_graph_image, visualize_dependencies, DependencyResolver, MetadataCache, LockfileResolver, load_lockfile, scan_node_modules, DependencyGraph, build_dependency_graph, build_dependency_graphs, EXPORTERS
 
 
 class TestDependencyVisualization(unittest.TestCase):
@@ -37,6 +44,190 @@ class TestDependencyVisualization(unittest.TestCase):
         with self.assertRaises(Exception):
             get_package_dependencies('nonexistent-package')
 
+    @patch('subprocess.run')
+    def test_get_package_dependencies_version_list(self, mock_run):
+        mock_run.return_value.returncode = 0
+        mock_run.return_value.stdout = json.dumps([
+            {'form-data': '^3.0.0'},
+            {'form-data': '^4.0.0'}
+        ])
+
+        dependencies = get_package_dependencies('axios@^1.0.0')
+        self.assertEqual(dependencies, {'form-data': '^4.0.0'})
+
+    def test_resolver_fetches_each_spec_once(self):
+        registry = {
+            'b@^1.0.0': {'d': '^1.0.0'},
+            'c@^1.0.0': {'d': '^1.0.0'},
+            'd@^1.0.0': {'b': '^1.0.0'},
+        }
+        calls = []
+        lock = threading.Lock()
+
+        def fetch(spec):
+            with lock:
+                calls.append(spec)
+            return registry[spec]
+
+        resolver = DependencyResolver(fetch, max_workers=4)
+        dependencies = {'b': '^1.0.0', 'c': '^1.0.0'}
+        graph = build_dependency_graph(dependencies, 'a', 1, 4, resolver)
+
+        self.assertEqual(sorted(calls), ['b@^1.0.0', 'c@^1.0.0', 'd@^1.0.0'])
+        edges = [(graph.names[s], graph.names[t], v) for s, t, v in graph.iter_edges()]
+        self.assertEqual(edges, [
+            ('a', 'b', '^1.0.0'), ('a', 'c', '^1.0.0'),
+            ('b', 'd', '^1.0.0'), ('c', 'd', '^1.0.0'), ('d', 'b', '^1.0.0')
+        ])
+
+    def test_graph_deduplicates_edges(self):
+        graph = DependencyGraph()
+        a, b = graph.node('a'), graph.node('b')
+        self.assertTrue(graph.add_edge(a, b, '^1.0.0'))
+        self.assertFalse(graph.add_edge(a, b, '^1.0.0'))
+        self.assertEqual(graph.node('a'), a)
+        self.assertEqual(graph.to_mermaid(), '  n0["a"]\n  n1["b"]\n  n0 -->|"^1.0.0"| n1\n')
+
+    def test_build_graph_respects_max_depth(self):
+        resolver = DependencyResolver(lambda spec: {'next': '1'})
+        graph = build_dependency_graph({'first': '1'}, 'root', 1, 1, resolver)
+        self.assertEqual(graph.names, ['root', 'first'])
+        self.assertEqual(resolver.cache, {})
+
+    def test_metadata_cache_ttl_and_eviction(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        cache = MetadataCache(os.path.join(tmp_dir, 'cache.sqlite'), ttl=3600, max_entries=2)
+        cache.put_many([('a@1', {'b': '1'}), ('b@1', {})])
+        self.assertEqual(cache.get('a@1'), {'b': '1'})
+        cache.put_many([('c@1', {})])
+        self.assertIsNone(cache.get('b@1'))
+        cache.ttl = -1
+        self.assertIsNone(cache.get('a@1'))
+        self.assertEqual(cache.get('a@1', allow_stale=True), {'b': '1'})
+        cache.close()
+
+    def test_offline_mode_with_stub_npm(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        stub_dir = os.path.join(tmp_dir, 'bin')
+        os.mkdir(stub_dir)
+        stub_path = os.path.join(stub_dir, 'npm')
+        with open(stub_path, 'w') as stub:
+            stub.write(f'#!{sys.executable}\n')
+            stub.write('import json, sys\n')
+            stub.write('registry = {"axios": {"form-data": "^4.0.0"}}\n')
+            stub.write('print(json.dumps(registry.get(sys.argv[2], {})))\n')
+        os.chmod(stub_path, 0o755)
+        cache_path = os.path.join(tmp_dir, 'cache.sqlite')
+
+        with patch.dict(os.environ, {'PATH': stub_dir + os.pathsep + os.environ['PATH']}):
+            cache = MetadataCache(cache_path)
+            online = DependencyResolver(cache=cache)
+            self.assertEqual(online.resolve('axios'), {'form-data': '^4.0.0'})
+            self.assertEqual(online.resolve('form-data@^4.0.0'), {})
+            cache.close()
+
+        with patch('subprocess.run') as mock_run:
+            cache = MetadataCache(cache_path, ttl=-1)
+            offline = DependencyResolver(cache=cache, offline=True)
+            self.assertEqual(offline.resolve('axios'), {'form-data': '^4.0.0'})
+            with self.assertRaises(Exception):
+                offline.resolve('lodash')
+            cache.close()
+            mock_run.assert_not_called()
+
+    def _write_json(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+    def test_lockfile_v3_resolver(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        self._write_json(lockfile_path, {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'dependencies': {'a': '^1.0.0', 'b': '^1.0.0'}},
+                'node_modules/a': {'version': '1.2.0', 'dependencies': {'b': '^2.0.0'}},
+                'node_modules/a/node_modules/b': {'version': '2.0.1'},
+                'node_modules/b': {'version': '1.0.3'}
+            }
+        })
+
+        with patch('subprocess.run') as mock_run:
+            resolver = LockfileResolver(load_lockfile(lockfile_path))
+            dependencies = resolver.resolve('app')
+            result = parse_dependencies(dependencies, 'app', 1, 3, resolver)
+            mock_run.assert_not_called()
+
+        self.assertEqual(result, (
+            '  n0["app"]\n  n1["a@1.2.0"]\n  n2["b@1.0.3"]\n  n3["b@2.0.1"]\n'
+            '  n0 -->|"1.2.0"| n1\n  n0 -->|"1.0.3"| n2\n  n1 -->|"2.0.1"| n3\n'
+        ))
+
+    def test_lockfile_workspaces_and_aliases(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        self._write_json(lockfile_path, {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'workspaces': ['packages/*'], 'dependencies': {'web': '*', 'foo': 'npm:bar@^1.0.0'}},
+                'node_modules/web': {'link': True, 'resolved': 'packages/web'},
+                'packages/web': {'name': 'web', 'version': '0.1.0', 'dependencies': {'b': '^2.0.0'}},
+                'packages/web/node_modules/b': {'version': '2.1.0'},
+                'node_modules/b': {'version': '1.0.0'},
+                'node_modules/foo': {'name': 'bar', 'version': '1.0.0', 'dependencies': {'b': '^1.0.0'}}
+            }
+        })
+
+        resolver = LockfileResolver(load_lockfile(lockfile_path))
+        dependencies = resolver.resolve('app')
+        self.assertEqual(dependencies, {'web': '0.1.0', 'foo': '1.0.0'})
+        graph = build_dependency_graph(dependencies, 'app', 1, 3, resolver)
+        edges = {(graph.names[source], graph.names[target]) for source, target, _ in graph.iter_edges()}
+        self.assertEqual(edges, {('app', 'web@0.1.0'), ('app', 'foo@1.0.0'),
+                                 ('web@0.1.0', 'b@2.1.0'), ('foo@1.0.0', 'b@1.0.0')})
+
+    def test_lockfile_v1_resolver(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        self._write_json(lockfile_path, {
+            'name': 'app',
+            'lockfileVersion': 1,
+            'dependencies': {
+                'a': {'version': '1.2.0', 'requires': {'b': '^2.0.0'},
+                      'dependencies': {'b': {'version': '2.0.1'}}},
+                'b': {'version': '1.0.3'}
+            }
+        })
+        self._write_json(os.path.join(tmp_dir, 'package.json'), {'dependencies': {'a': '^1.0.0'}})
+
+        resolver = LockfileResolver(load_lockfile(lockfile_path))
+        self.assertEqual(resolver.resolve('app'), {'a': '1.2.0'})
+        self.assertEqual(resolver.resolve('a@1.2.0'), {'b': '2.0.1'})
+        with self.assertRaises(Exception):
+            resolver.resolve('missing')
+
+    def test_node_modules_resolver(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self._write_json(os.path.join(tmp_dir, 'package.json'),
+                         {'name': 'app', 'dependencies': {'@scope/a': '^1.0.0'}})
+        self._write_json(os.path.join(tmp_dir, 'node_modules', '@scope', 'a', 'package.json'),
+                         {'name': '@scope/a', 'version': '1.0.0', 'dependencies': {'b': '*'}})
+        self._write_json(os.path.join(tmp_dir, 'node_modules', 'b', 'package.json'),
+                         {'name': 'b', 'version': '3.1.4'})
+
+        resolver = LockfileResolver(scan_node_modules(tmp_dir))
+        self.assertEqual(resolver.resolve('app'), {'@scope/a': '1.0.0'})
+        self.assertEqual(resolver.resolve('@scope/a@1.0.0'), {'b': '3.1.4'})
+
     @patch('subprocess.run')
     def test_parse_dependencies(self, mock_run):
         mock_run.return_value.returncode = 0
@@ -76,37 +267,378 @@ class TestDependencyVisualization(unittest.TestCase):
     @patch('builtins.print')
     @patch('main.load_config')
     @patch('main.get_package_dependencies')
-    @patch('main.parse_dependencies')
-    @patch('main.generate_mermaid_graph')
-    @patch('main.save_graph_to_file')
     @patch('main.generate_graph_image')
-    def test_visualize_dependencies(self, mock_generate_graph_image, mock_save_graph_to_file, mock_generate_mermaid_graph, mock_parse_dependencies, mock_get_package_dependencies, mock_load_config, mock_print):
+    def test_visualize_dependencies(self, mock_generate_graph_image, mock_get_package_dependencies, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        output_path = os.path.join(tmp_dir, 'temp.mmd')
         mock_load_config.return_value = {
             'visualizer_path': '/opt/homebrew/bin/mmdc',
             'package_name': 'axios',
             'output_image_path': './graph.png',
+            'output_path': output_path,
             'max_depth': 3
         }
-        mock_get_package_dependencies.return_value = {
-            'axios': '^1.7.9'
-        }
-        mock_parse_dependencies.return_value = '''  axios --> follow-redirects(^1.15.6)
-  axios --> form-data(^4.0.0)
-'''
-        mock_generate_mermaid_graph.return_value = 'graph TD\n  axios --> follow-redirects(^1.15.6)\n'
-        mock_save_graph_to_file.return_value = None
-        mock_generate_graph_image.return_value = None
+        mock_get_package_dependencies.side_effect = lambda spec: {
+            'axios': {'form-data': '^4.0.0'},
+            'form-data@^4.0.0': {'asynckit': '^0.4.0'},
+            'asynckit@^0.4.0': {}
+        }[spec]
 
         visualize_dependencies()
 
         mock_load_config.assert_called_once_with('config.yaml')
-        mock_get_package_dependencies.assert_called_once_with('axios')
-        mock_parse_dependencies.assert_called_once()
-        mock_generate_mermaid_graph.assert_called_once()
-        mock_save_graph_to_file.assert_called_once_with('graph TD\n  axios --> follow-redirects(^1.15.6)\n', 'temp.mmd')
-        mock_generate_graph_image.assert_called_once_with('temp.mmd', './graph.png', '/opt/homebrew/bin/mmdc')
+        with open(output_path) as file:
+            self.assertEqual(file.read(), (
+                'graph TD\n  n0["axios"]\n'
+                '  n0 -->|"^4.0.0"| n1["form-data"]\n'
+                '  n1 -->|"^0.4.0"| n2["asynckit"]\n'
+            ))
+        mock_generate_graph_image.assert_called_once_with(output_path, './graph.png', '/opt/homebrew/bin/mmdc')
         mock_print.assert_not_called()
 
+    @patch('main.load_config')
+    @patch('main.get_package_dependencies')
+    @patch('main.generate_graph_image')
+    def test_visualize_dependencies_without_render(self, mock_generate_graph_image, mock_get_package_dependencies, mock_load_config):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        output_path = os.path.join(tmp_dir, 'graph.json')
+        mock_load_config.return_value = {
+            'visualizer_path': '/opt/homebrew/bin/mmdc',
+            'package_name': 'axios',
+            'output_image_path': './graph.png',
+            'output_path': output_path,
+            'output_format': 'json',
+            'max_depth': 3
+        }
+        mock_get_package_dependencies.side_effect = lambda spec: {
+            'axios': {'form-data': '^4.0.0', 'proxy-from-env': '^1.1.0'},
+            'form-data@^4.0.0': {'axios': '^1.0.0'},
+            'proxy-from-env@^1.1.0': {}
+        }[spec]
+
+        visualize_dependencies()
+
+        with open(output_path) as file:
+            self.assertEqual(json.load(file), {
+                'roots': ['axios'],
+                'dependencies': {
+                    'axios': {'form-data': '^4.0.0', 'proxy-from-env': '^1.1.0'},
+                    'form-data': {'axios': '^1.0.0'}
+                }
+            })
+        mock_generate_graph_image.assert_not_called()
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.get_package_dependencies')
+    def test_visualize_many_roots(self, mock_get_package_dependencies, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self._write_json(os.path.join(tmp_dir, 'packages', 'web', 'package.json'),
+                         {'name': '@corp/web', 'dependencies': {'axios': '^1.7.9'}})
+        mock_load_config.return_value = {
+            'package_names': ['axios'],
+            'package_json_glob': os.path.join(tmp_dir, 'packages', '*', 'package.json'),
+            'output_dir': os.path.join(tmp_dir, 'out'),
+            'output_format': 'json',
+            'max_depth': 3
+        }
+        mock_get_package_dependencies.side_effect = lambda spec: {
+            'axios': {'form-data': '^4.0.0'},
+            'axios@^1.7.9': {'form-data': '^4.0.0'},
+            'form-data@^4.0.0': {'asynckit': '^0.4.0'},
+            'asynckit@^0.4.0': {}
+        }[spec]
+
+        visualize_dependencies()
+
+        with open(os.path.join(tmp_dir, 'out', '@corp__web.json')) as file:
+            self.assertEqual(json.load(file)['roots'], ['@corp/web'])
+        with open(os.path.join(tmp_dir, 'out', 'merged.json')) as file:
+            merged = json.load(file)
+        self.assertEqual(merged['roots'], ['axios', '@corp/web'])
+        self.assertEqual(merged['dependencies']['@corp/web'], {'axios': '^1.7.9'})
+        self.assertEqual(merged['dependencies']['form-data'], {'asynckit': '^0.4.0'})
+        self.assertEqual(mock_get_package_dependencies.call_count, 4)
+        mock_print.assert_called_once_with(
+            'Корневых пакетов: 2, запросов зависимостей: 5, уникальных: 4, '
+            'сэкономлено благодаря общему кэшу: 1'
+        )
+
+    def test_roots_are_fetched_level_by_level(self):
+        registry = {'a@1': {'c': '1'}, 'b@1': {'c': '1'}, 'c@1': {}}
+        resolver = DependencyResolver(registry.__getitem__)
+        with patch.object(resolver, 'prefetch', wraps=resolver.prefetch) as mock_prefetch:
+            graphs = build_dependency_graphs([('x', {'a': '1'}), ('y', {'b': '1'})], 1, 3, resolver)
+        self.assertEqual(mock_prefetch.call_args_list, [call(['a@1', 'b@1']), call(['c@1', 'c@1'])])
+        self.assertEqual([[(graph.names[source], graph.names[target]) for source, target, _ in graph.iter_edges()]
+                          for graph in graphs],
+                         [[('x', 'a'), ('a', 'c')], [('y', 'b'), ('b', 'c')]])
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    def test_visualize_many_manifests_with_lockfile(self, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        manifest = {'name': '@corp/web', 'dependencies': {'a': '^1.0.0', 'b': '^2.0.0'}}
+        self._write_json(os.path.join(tmp_dir, 'packages', 'web', 'package.json'), manifest)
+        self._write_json(os.path.join(tmp_dir, 'package-lock.json'), {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'workspaces': ['packages/*']},
+                'packages/web': manifest,
+                'node_modules/a': {'version': '1.2.0', 'dependencies': {'b': '^1.0.0'}},
+                'node_modules/b': {'version': '1.0.0'},
+                'packages/web/node_modules/b': {'version': '2.1.0'}
+            }
+        })
+        mock_load_config.return_value = {
+            'resolver': 'lockfile',
+            'lockfile_path': os.path.join(tmp_dir, 'package-lock.json'),
+            'package_json_glob': os.path.join(tmp_dir, 'packages', '*', 'package.json'),
+            'output_dir': os.path.join(tmp_dir, 'out'),
+            'output_format': 'json',
+            'max_depth': 3
+        }
+
+        visualize_dependencies()
+
+        with open(os.path.join(tmp_dir, 'out', 'merged.json')) as file:
+            dependencies = json.load(file)['dependencies']
+        self.assertEqual(dependencies['@corp/web'], {'a@1.2.0': '1.2.0', 'b@2.1.0': '2.1.0'})
+        self.assertEqual(dependencies['a@1.2.0'], {'b@1.0.0': '1.0.0'})
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.subprocess.run')
+    def test_profile_report(self, mock_run, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        profile_path = os.path.join(tmp_dir, 'profile.json')
+        mock_load_config.return_value = {
+            'visualizer_path': 'mmdc',
+            'package_name': 'axios',
+            'output_image_path': os.path.join(tmp_dir, 'graph.png'),
+            'output_path': os.path.join(tmp_dir, 'temp.mmd'),
+            'max_depth': 3
+        }
+        registry = {
+            'axios': {'form-data': '^4.0.0', 'follow-redirects': '^1.15.0'},
+            'form-data@^4.0.0': {'follow-redirects': '^1.15.0'},
+            'follow-redirects@^1.15.0': {}
+        }
+        mock_run.side_effect = lambda args, **kwargs: subprocess.CompletedProcess(
+            args, 0, stdout=json.dumps(registry[args[2]]) if args[0] == 'npm' else '', stderr='')
+
+        visualize_dependencies(profile_path)
+
+        with open(profile_path) as file:
+            report = json.load(file)
+        stages = [stage['stage'] for stage in report['stages']]
+        self.assertEqual(stages, ['total', 'total;config', 'total;graph', 'total;graph;resolve', 'total;render'])
+        self.assertEqual(report['timers']['subprocess npm show']['calls'], 3)
+        self.assertEqual(report['timers']['json parse']['calls'], 3)
+        self.assertEqual(report['timers']['subprocess mmdc']['calls'], 1)
+        self.assertEqual({entry['package'] for entry in report['packages']}, set(registry))
+        self.assertEqual(report['counters']['fetches'], 3)
+        self.assertEqual(report['counters']['memory cache misses'], 3)
+        self.assertIn('resolve', mock_print.call_args.args[0])
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.generate_graph_image')
+    def test_incremental_lockfile_regeneration(self, mock_generate_graph_image, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        lockfile = {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'dependencies': {'a': '^1.0.0'}},
+                'node_modules/a': {'version': '1.0.0', 'dependencies': {'b': '^1.0.0'}},
+                'node_modules/b': {'version': '1.0.0'}
+            }
+        }
+        self._write_json(lockfile_path, lockfile)
+        mock_load_config.return_value = {
+            'visualizer_path': 'mmdc',
+            'package_name': 'app',
+            'output_image_path': os.path.join(tmp_dir, 'graph.png'),
+            'output_path': os.path.join(tmp_dir, 'temp.mmd'),
+            'state_path': os.path.join(tmp_dir, 'state.json'),
+            'resolver': 'lockfile',
+            'lockfile_path': lockfile_path,
+            'max_depth': 3
+        }
+
+        mock_generate_graph_image.side_effect = self._render
+        visualize_dependencies()
+        mock_print.assert_called_with('Граф обновлён: добавлено рёбер 2, удалено 0')
+        self.assertEqual(mock_generate_graph_image.call_count, 1)
+
+        visualize_dependencies()
+        mock_print.assert_called_with('Входные данные не изменились, граф не перестраивается')
+        self.assertEqual(mock_generate_graph_image.call_count, 1)
+
+        lockfile['packages']['node_modules/b']['version'] = '1.0.1'
+        self._write_json(lockfile_path, lockfile)
+        visualize_dependencies()
+        mock_print.assert_called_with('Граф обновлён: добавлено рёбер 1, удалено 1')
+        self.assertEqual(mock_generate_graph_image.call_count, 2)
+
+        lockfile['packages']['node_modules/b']['license'] = 'MIT'
+        self._write_json(lockfile_path, lockfile)
+        visualize_dependencies()
+        mock_print.assert_called_with('Граф не изменился, перерисовка пропущена')
+        self.assertEqual(mock_generate_graph_image.call_count, 2)
+
+    @staticmethod
+    def _render(input_file, output_file, visualizer_path):
+        with open(output_file, 'w') as file:
+            file.write('png')
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.generate_graph_image')
+    def test_incremental_reexports_when_outputs_change(self, mock_generate_graph_image, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        self._write_json(lockfile_path, {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'dependencies': {'a': '^1.0.0'}},
+                'node_modules/a': {'version': '1.0.0'}
+            }
+        })
+        image_path = os.path.join(tmp_dir, 'graph.png')
+        config = {
+            'visualizer_path': 'mmdc',
+            'package_name': 'app',
+            'output_image_path': image_path,
+            'output_path': os.path.join(tmp_dir, 'graph.out'),
+            'state_path': os.path.join(tmp_dir, 'state.json'),
+            'resolver': 'lockfile',
+            'lockfile_path': lockfile_path,
+            'max_depth': 3
+        }
+        mock_load_config.return_value = config
+        mock_generate_graph_image.side_effect = self._render
+        visualize_dependencies()
+        self.assertEqual(mock_generate_graph_image.call_count, 1)
+
+        # Пропавшее изображение отрисовывается заново, хотя входные данные те же.
+        os.remove(image_path)
+        visualize_dependencies()
+        self.assertEqual(mock_generate_graph_image.call_count, 2)
+        self.assertTrue(os.path.exists(image_path))
+
+        # Тот же путь, другой формат: файл перезаписывается в новом формате.
+        config['output_format'] = 'json'
+        visualize_dependencies()
+        with open(config['output_path']) as file:
+            self.assertEqual(json.load(file)['dependencies']['app'], {'a@1.0.0': '1.0.0'})
+        mock_print.assert_called_with('Граф обновлён: добавлено рёбер 0, удалено 0')
+
+        visualize_dependencies()
+        mock_print.assert_called_with('Входные данные не изменились, граф не перестраивается')
+        self.assertEqual(mock_generate_graph_image.call_count, 2)
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.generate_graph_image')
+    def test_incremental_state_saved_after_render(self, mock_generate_graph_image, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        lockfile_path = os.path.join(tmp_dir, 'package-lock.json')
+        lockfile = {
+            'name': 'app',
+            'lockfileVersion': 3,
+            'packages': {
+                '': {'dependencies': {'a': '^1.0.0'}},
+                'node_modules/a': {'version': '1.0.0'}
+            }
+        }
+        self._write_json(lockfile_path, lockfile)
+        mock_load_config.return_value = {
+            'visualizer_path': 'mmdc',
+            'package_name': 'app',
+            'output_image_path': os.path.join(tmp_dir, 'graph.png'),
+            'output_path': os.path.join(tmp_dir, 'temp.mmd'),
+            'state_path': os.path.join(tmp_dir, 'state.json'),
+            'resolver': 'lockfile',
+            'lockfile_path': lockfile_path,
+            'max_depth': 3
+        }
+        mock_generate_graph_image.side_effect = self._render
+        visualize_dependencies()
+
+        # mmdc падает, старое изображение остаётся на месте.
+        lockfile['packages']['node_modules/a']['version'] = '1.0.1'
+        self._write_json(lockfile_path, lockfile)
+        mock_generate_graph_image.side_effect = Exception("mmdc")
+        with self.assertRaises(Exception):
+            visualize_dependencies()
+
+        mock_generate_graph_image.side_effect = self._render
+        visualize_dependencies()
+        mock_print.assert_called_with('Граф обновлён: добавлено рёбер 1, удалено 1')
+        self.assertEqual(mock_generate_graph_image.call_count, 3)
+
+    @patch('subprocess.run')
+    def test_generate_graph_image_failure(self, mock_run):
+        mock_run.return_value.returncode = 1
+        with self.assertRaises(Exception):
+            generate_graph_image('temp.mmd', 'graph.png', 'mmdc')
+
+    @patch('builtins.print')
+    @patch('main.load_config')
+    @patch('main.get_package_dependencies')
+    def test_incremental_reuses_previous_resolutions(self, mock_get_package_dependencies, mock_load_config, mock_print):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        mock_load_config.return_value = {
+            'package_name': 'axios',
+            'output_path': os.path.join(tmp_dir, 'graph.json'),
+            'output_format': 'json',
+            'state_path': os.path.join(tmp_dir, 'state.json'),
+            'max_depth': 3
+        }
+        mock_get_package_dependencies.side_effect = lambda spec: {
+            'axios': {'form-data': '^4.0.0'},
+            'form-data@^4.0.0': {}
+        }[spec]
+
+        visualize_dependencies()
+        self.assertEqual(mock_get_package_dependencies.call_count, 2)
+
+        visualize_dependencies()
+        self.assertEqual(mock_get_package_dependencies.call_count, 2)
+        mock_print.assert_called_with('Граф не изменился, перерисовка пропущена')
+
+    def test_exporters_write_valid_documents(self):
+        registry = {'b@1': {'c': '1'}, 'c@1': {'a': '1'}}
+        outputs = {}
+        for name, exporter_class in EXPORTERS.items():
+            buffer = io.StringIO()
+            build_dependency_graph({'b': '1', 'c': '1'}, 'a', 1, 3,
+                                   DependencyResolver(registry.__getitem__), exporter_class(buffer))
+            outputs[name] = buffer.getvalue()
+
+        root = ET.fromstring(outputs['graphml'])
+        namespace = '{http://graphml.graphdrawing.org/xmlns}'
+        self.assertEqual(len(list(root.iter(namespace + 'node'))), 3)
+        self.assertEqual(len(list(root.iter(namespace + 'edge'))), 4)
+        self.assertEqual(json.loads(outputs['json'])['dependencies']['c'], {'a': '1'})
+        self.assertTrue(outputs['dot'].startswith('digraph dependencies {\n'))
+        self.assertEqual(outputs['dot'].count(' -> '), 4)
+        self.assertEqual(outputs['mermaid'].count(' -->'), 4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,288 @@
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List
+
+from main import TranslationError, transform_input_text, translate_file
+
+
+def legacy_transform_input_text(input_text):
+    """Прежняя цепочка замен регулярными выражениями, для сравнения."""
+    processed_lines = []
+    variable_map = {}
+
+    input_text = re.sub(r'::', '#', input_text)
+
+    def replace_multiline_comment(match):
+        comment_content = match.group(1).strip()
+        return "\n".join([f"# {line}" for line in comment_content.splitlines()])
+
+    input_text = re.sub(r'--\[\[(.*?)\]\]', replace_multiline_comment, input_text, flags=re.DOTALL)
+
+    def process_constant(match):
+        constant_name = match.group(1).strip()
+        constant_value = match.group(2).strip()
+        variable_map[constant_name] = constant_value
+        return f"{constant_name} = {constant_value}"
+
+    input_text = re.sub(r'set\s+([a-zA-Z_][a-zA-Z0-9]*)\s*=\s*(.*)', process_constant, input_text)
+
+    def handle_dict(match):
+        dict_entries = match.group(1).split(',')
+        dict_representation = "[[dict]]\n"
+        for entry in dict_entries:
+            key, value = entry.split('=', 1)
+            key = key.strip()
+            value = value.strip()
+
+            if value.startswith("$") and value.endswith("$"):
+                value = variable_map.get(value[1:-1], value)
+
+            dict_representation += f"{key} = {value}\n"
+        return dict_representation.strip()
+
+    input_text = re.sub(r'dict\((.*?)\)', handle_dict, input_text, flags=re.DOTALL)
+
+    for line in input_text.splitlines():
+        stripped_line = line.strip()
+        if stripped_line:
+            processed_lines.append(stripped_line)
+
+    return "\n".join(processed_lines)
+
+
+def generate_config(size, comment_density=0.5, dict_width=3, constants=100, seed=0):
+    """Синтетическая конфигурация размером не меньше size байт.
+
+    Сначала объявляется цепочка из constants констант, затем идут словари
+    из dict_width элементов: числа, строки, массивы, ссылки на константы и
+    выражения над ними. Перед словарём с вероятностью comment_density стоит
+    многострочный комментарий. Одинаковый seed даёт одинаковый текст.
+    """
+    rng = random.Random(seed)
+    blocks = ["set c0 = 1\n"] if constants else []
+    blocks.extend(f"set c{index} = .[c{index - 1} + {index}].\n" for index in range(1, constants))
+    written = sum(len(block) for block in blocks)
+    index = 0
+    while written < size:
+        entries = []
+        for key in range(dict_width):
+            kind = rng.randrange(5 if constants else 3)
+            if kind == 0:
+                entries.append(f"    k{key} = {index}.5")
+            elif kind == 1:
+                entries.append(f"    k{key} = \"item{index}\"")
+            elif kind == 2:
+                entries.append(f"    k{key} = #({key}, {index}, \"x\")")
+            elif kind == 3:
+                entries.append(f"    k{key} = $c{rng.randrange(constants)}$")
+            else:
+                entries.append(f"    k{key} = .[c{rng.randrange(constants)} * 2 + {key}].")
+        block = f":: блок {index}\ndict(\n" + ",\n".join(entries) + "\n)\n\n"
+        if rng.random() < comment_density:
+            block = f"--[[\nОписание блока {index}\nи его параметров\n]]\n" + block
+        blocks.append(block)
+        written += len(block.encode('utf-8'))
+        index += 1
+    return "".join(blocks)
+
+
+def simple_config(size):
+    """Конфигурация из блоков, которые понимает и прежняя реализация:
+    без массивов, выражений и запятых внутри значений."""
+    blocks = []
+    written = 0
+    index = 0
+    while written < size:
+        block = (
+            f":: блок {index}\n"
+            f"set limit{index} = {index}\n"
+            f"--[[\nОписание блока {index}\nи его параметров\n]]\n"
+            f"dict(\n    name = \"item{index}\",\n    size = $limit{index}$,\n"
+            f"    ratio = {index}.5\n)\n\n"
+        )
+        blocks.append(block)
+        written += len(block.encode('utf-8'))
+        index += 1
+    return "".join(blocks)
+
+
+def unterminated_config(size):
+    """Текст из строк "dict(" без закрывающей скобки: прежний ленивый
+    шаблон с DOTALL просматривает остаток текста от каждой из них."""
+    line = "dict(a = 1\n"
+    return line * (size // len(line) + 1)
+
+
+def unterminated_comment(size):
+    """Большой текст, после которого открыт и не закрыт комментарий."""
+    return generate_config(size) + "--[[\nне закрыт\n" + "строка\n" * 10
+
+
+def long_line(size):
+    """Одна строка без переводов: файл читается кусками меньше строки."""
+    return "dict(" + ", ".join(f"k{index} = {index}" for index in range(size // 12)) + ")"
+
+
+def forward_constants(size):
+    """Константы, каждая из которых ссылается на объявленную ниже."""
+    count = size // 24
+    lines = [f"set c{index} = .[c{index + 1} + 1]." for index in range(count)]
+    lines.append(f"set c{count} = 0")
+    return "\n".join(lines)
+
+
+def nested_dicts(size):
+    """Словари с глубоко вложенными таблицами и массивами."""
+    block = "dict(a = dict(b = dict(c = #(1, #(2, #(3)), dict(d = 4)))), e = 5)\n"
+    return block * (size // len(block) + 1)
+
+
+# Входы, на которых легче всего получить квадратичное время.
+PATHOLOGICAL = {
+    "typical": generate_config,
+    "unterminated dict(": unterminated_config,
+    "unterminated --[[": unterminated_comment,
+    "comment dense": lambda size: generate_config(size, comment_density=1.0, dict_width=1),
+    "long line": long_line,
+    "forward constants": forward_constants,
+    "nested dicts": nested_dicts,
+}
+
+
+def measure(transform, *args):
+    """Время до результата или до сообщения о синтаксической ошибке."""
+    start = time.perf_counter()
+    try:
+        transform(*args)
+    except TranslationError:
+        pass
+    return time.perf_counter() - start
+
+
+def peak_memory(transform, *args):
+    tracemalloc.start()
+    try:
+        transform(*args)
+    except TranslationError:
+        pass
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak
+
+
+def bench_compare(sizes_mb: List[float], max_slowdown: float, repeat: int) -> None:
+    """Прежняя цепочка регулярных выражений против парсера по лучшему из
+    repeat прогонов. Завершается с ошибкой, если на типичной конфигурации
+    парсер медленнее прежней цепочки больше чем в max_slowdown раз."""
+    failed = []
+    for title, generate, scale in (
+        ("typical config:", simple_config, 1),
+        # Прежняя реализация на этом входе квадратична, поэтому размеры в 100 раз меньше.
+        ("unterminated dict(:", unterminated_config, 100),
+    ):
+        print(title)
+        print(f"{'MB':>6} {'regex, s':>10} {'parser, s':>10} {'regex MB/s':>11} {'parser MB/s':>12} "
+              f"{'slowdown':>9}")
+        for size_mb in sizes_mb:
+            text = generate(int(size_mb * 2**20 / scale))
+            megabytes = len(text.encode('utf-8')) / 2**20
+            legacy = min(measure(legacy_transform_input_text, text) for _ in range(repeat))
+            parser = min(measure(transform_input_text, text) for _ in range(repeat))
+            slowdown = parser / legacy
+            print(f"{megabytes:>6.2f} {legacy:>10.3f} {parser:>10.3f} "
+                  f"{megabytes / legacy:>11.2f} {megabytes / parser:>12.2f} {slowdown:>8.1f}x")
+            if generate is simple_config and slowdown > max_slowdown:
+                failed.append(f"{megabytes:.2f} MB")
+    if failed:
+        sys.exit(f"parser is more than {max_slowdown:g}x slower than the regex chain: {', '.join(failed)}")
+
+
+def bench_throughput(sizes_mb: List[float], comment_density: float, dict_width: int,
+                     constants: int, seed: int) -> None:
+    """Скорость и пиковая память translate_file на сгенерированных файлах."""
+    print(f"comment density {comment_density}, dict width {dict_width}, "
+          f"constants {constants}, seed {seed}")
+    print(f"{'MB':>8} {'seconds':>8} {'MB/s':>8} {'peak KiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "config.txt")
+        output_path = os.path.join(tmp_dir, "config.toml")
+        for size_mb in sizes_mb:
+            text = generate_config(int(size_mb * 2**20), comment_density, dict_width, constants, seed)
+            with open(input_path, "w", encoding="utf-8") as file:
+                file.write(text)
+            del text
+            megabytes = os.path.getsize(input_path) / 2**20
+            seconds = measure(translate_file, input_path, output_path)
+            # Отдельный прогон: tracemalloc заметно замедляет выполнение.
+            peak = peak_memory(translate_file, input_path, output_path)
+            print(f"{megabytes:>8.2f} {seconds:>8.3f} {megabytes / seconds:>8.2f} {peak / 1024:>9.0f}")
+
+
+def growth_exponent(generate, sizes, chunk_size, repeat):
+    """Показатель k в time ~ size**k между крайними размерами по лучшему из
+    repeat прогонов translate_file."""
+    times = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "config.txt")
+        output_path = os.path.join(tmp_dir, "config.toml")
+        for size in sizes:
+            with open(input_path, "w", encoding="utf-8") as file:
+                file.write(generate(size))
+            times.append(min(measure(translate_file, input_path, output_path, chunk_size)
+                             for _ in range(repeat)))
+    return math.log(times[-1] / times[0]) / math.log(sizes[-1] / sizes[0]), times
+
+
+def bench_regress(size_kb: int, max_exponent: float, chunk_size: int, repeat: int) -> None:
+    """Завершается с ошибкой, если время на каком-либо входе растёт быстрее
+    size**max_exponent."""
+    sizes = [size_kb * 1024 * factor for factor in (1, 2, 4)]
+    print(f"{'input':<20}" + "".join(f"{size // 1024:>9}K" for size in sizes) + f"{'exponent':>10}")
+    failed = []
+    for name, generate in PATHOLOGICAL.items():
+        exponent, times = growth_exponent(generate, sizes, chunk_size, repeat)
+        status = "ok" if exponent <= max_exponent else "SUPERLINEAR"
+        print(f"{name:<20}" + "".join(f"{seconds:>9.3f}s" for seconds in times)
+              + f"{exponent:>10.2f} {status}")
+        if exponent > max_exponent:
+            failed.append(name)
+    if failed:
+        sys.exit(f"superlinear growth: {', '.join(failed)}")
+
+
+BENCHMARKS: dict = {
+    "compare": lambda args: bench_compare(args.sizes, args.max_slowdown, args.repeat),
+    "throughput": lambda args: bench_throughput(
+        args.sizes, args.comment_density, args.dict_width, args.constants, args.seed),
+    "regress": lambda args: bench_regress(args.size_kb, args.max_exponent, args.chunk_size, args.repeat),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Config translator benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 100], help="MB")
+    parser.add_argument("--comment-density", type=float, default=0.5)
+    parser.add_argument("--dict-width", type=int, default=3)
+    parser.add_argument("--constants", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--max-exponent", type=float, default=1.25)
+    parser.add_argument("--max-slowdown", type=float, default=12)
+    parser.add_argument("--chunk-size", type=int, default=1 << 12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run: Callable = BENCHMARKS[args.benchmark]
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
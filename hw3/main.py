@@ -1,51 +1,1289 @@
+import os
 import sys
 import re
+import glob
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+CHUNK_SIZE = 1 << 16
+BUFFER_FRAGMENTS = 1 << 10
+STATE_PATH = '.translate_state.json'
+
+class TranslationError(Exception):
+    """Синтаксическая ошибка во входном тексте."""
+
+    def __init__(self, message, line):
+        super().__init__(f"строка {line}: {message}")
+        self.line = line
+
+
+class UndefinedConstant(TranslationError):
+    def __init__(self, name, line):
+        super().__init__(f"неизвестная константа {name}", line)
+        self.name = name
+
+
+# Лексемы, общие для обоих режимов лексера.
+NAME = r'[A-Za-z_][A-Za-z0-9_]*'
+NUMBER = r'[0-9]+(?:\.[0-9]+)?'
+STRING = r'"(?:[^"\\\n]|\\.)*"' r"|'(?:[^'\\\n]|\\.)*'"
+REF = r'\$[A-Za-z_][A-Za-z0-9_]*\$'
+KEYWORD = r'(?:set|dict)(?![A-Za-z0-9_])'
+
+# Лексемы распознаются одним регулярным выражением: каждая альтернатива
+# однозначно определяется первыми символами, кроме assign — она забирает
+# пробелы вокруг =, а если за пробелами нет =, они становятся лексемой space.
+TOKEN_PATTERN = re.compile(rf"""
+    (?P<block_comment>--\[\[)
+  | (?P<comment>::[^\n]*)
+  | (?P<newline>\n[ \t\r\f\v]*)
+  | (?P<assign>[ \t\r\f\v]*=[ \t\r\f\v]*)
+  | (?P<space>[ \t\r\f\v]+)
+  | (?P<string>{STRING})
+  | (?P<ref>{REF})
+  | (?P<name>{NAME})
+  | (?P<number>{NUMBER})
+  | (?P<expr_open>\.\[)
+  | (?P<operator>[-+*\[\]])
+  | (?P<punct>[(),])
+  | (?P<text>[^\sA-Za-z0-9_$"'(),=:+*.\[\]-]+|.)
+""", re.VERBOSE)
+
+# Режим верхнего уровня: для парсера там значимы только комментарии,
+# выражения .[ ]. и ключевые слова, поэтому всё остальное, включая
+# переводы строк, выдаётся одной лексемой text. Она составлена из тех же
+# лексем, что и в обычном режиме, чтобы строки, ссылки и имена вроде
+# set_x или $dict$ делились на лексемы одинаково в обоих режимах.
+TOP_TOKEN_PATTERN = re.compile(rf"""
+    (?P<block_comment>--\[\[)
+  | (?P<comment>::[^\n]*)
+  | (?P<expr_open>\.\[)
+  | (?P<name>{KEYWORD})
+  | (?P<text>(?:{STRING}|{REF}|(?!{KEYWORD}){NAME}|{NUMBER}
+               |[^-:.A-Za-z0-9_]|-(?!-\[\[)|:(?!:)|\.(?!\[))+)
+""", re.VERBOSE)
+
+
+def tokenize(source, line=1):
+    """Разбивает текст на лексемы (вид, текст, строка) за один проход.
+
+    source — строка или итератор кусков текста произвольной длины, line —
+    номер его первой строки в документе (для фрагментов файла). В памяти
+    держится только текущий кусок строк: лексемы не пересекают конец
+    разобранной части буфера, а склеенные тексты лексем дают исходный
+    текст. Многострочный комментарий выдаётся как --[[, затем comment_text —
+    весь текст, если ]] уже в буфере, иначе по строке вместе с переводом
+    строки, — и comment_end. Последней всегда идёт лексема eof.
+
+    Парсер передаёт через send(True), что следующая лексема нужна на
+    верхнем уровне документа; тогда она читается в режиме
+    TOP_TOKEN_PATTERN.
+    """
+    chunks = iter([source] if isinstance(source, str) else source)
+    top = None
+    buffer = ''
+    position = 0
+    eof = False
+    comment_line = None
+    while True:
+        # Разбирается всё до последнего перевода строки в буфере; хвост
+        # незаконченной строки ждёт следующего куска.
+        end = len(buffer) if eof else buffer.rfind('\n', position) + 1
+        if position >= end:
+            if eof:
+                break
+            # Куски склеиваются один раз, когда найден конец строки, иначе
+            # очень длинная строка копировалась бы с каждым новым куском.
+            pieces = [buffer[position:]]
+            while True:
+                chunk = next(chunks, '')
+                if not chunk:
+                    eof = True
+                    break
+                pieces.append(chunk)
+                if '\n' in chunk:
+                    break
+            buffer = ''.join(pieces)
+            position = 0
+            continue
+        while position < end:
+            if comment_line is not None:
+                close = buffer.find(']]', position, end)
+                if close == -1:
+                    line_end = buffer.find('\n', position, end) + 1 or end
+                    top = yield 'comment_text', buffer[position:line_end], line
+                    if buffer[line_end - 1] == '\n':
+                        line += 1
+                    position = line_end
+                else:
+                    text = buffer[position:close]
+                    top = yield 'comment_text', text, line
+                    line += text.count('\n')
+                    top = yield 'comment_end', ']]', line
+                    comment_line = None
+                    position = close + 2
+                continue
+            # Сканер идёт по буферу до смены режима или до комментария --[[.
+            mode = top
+            scan = (TOP_TOKEN_PATTERN if mode else TOKEN_PATTERN).scanner(buffer, position, end).match
+            while True:
+                token = scan()
+                if token is None:
+                    position = end
+                    break
+                kind = token.lastgroup
+                text = token.group()
+                top = yield kind, text, line
+                if kind == 'newline':
+                    line += 1
+                elif kind == 'text':
+                    line += text.count('\n')
+                elif kind == 'block_comment':
+                    comment_line = line
+                    position = token.end()
+                    break
+                if top != mode:
+                    position = token.end()
+                    break
+    if comment_line is not None:
+        raise TranslationError("незакрытый многострочный комментарий --[[", comment_line)
+    yield 'eof', '', line
+
+
+STATEMENT_KINDS = ('comment', 'expr_open')
+KEYWORDS = ('set', 'dict')
+
+Text = namedtuple('Text', 'text')
+Comment = namedtuple('Comment', 'text')
+BlockComment = namedtuple('BlockComment', 'text')
+Constant = namedtuple('Constant', 'name value line')
+Dict = namedtuple('Dict', 'entries line')
+Expression = namedtuple('Expression', 'expression line')
+
+# Значения и константные выражения.
+Literal = namedtuple('Literal', 'value text')
+Raw = namedtuple('Raw', 'text')
+Name = namedtuple('Name', 'name line')
+Unary = namedtuple('Unary', 'operator operand line')
+Binary = namedtuple('Binary', 'operator left right line')
+Call = namedtuple('Call', 'function arguments line')
+Array = namedtuple('Array', 'elements line')
+
+
+def comment_nodes(lines):
+    """Строки многострочного комментария без пустых строк и пробелов в
+    начале и в конце. Последняя непустая строка придерживается до
+    следующей, чтобы обрезать её справа."""
+    last = None
+    blank = 0
+    for text in lines:
+        if not text.strip():
+            blank += last is not None
+            continue
+        if last is None:
+            text = text.lstrip()
+        else:
+            yield BlockComment(last)
+            yield Text('\n')
+            for _ in range(blank):
+                yield BlockComment('')
+                yield Text('\n')
+        last = text
+        blank = 0
+    if last is not None:
+        yield BlockComment(last.rstrip())
+
+
+class Parser:
+    """Рекурсивный спуск по потоку лексем.
+
+    Верхний уровень документа — последовательность узлов: комментарии,
+    объявления set, словари dict(...) и текст, который переносится в
+    вывод без изменений. Лексемы читаются лениво с просмотром вперёд,
+    поэтому текст и комментарии внутри строк не затрагиваются.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.next_token = self.tokens.__next__
+        self.lookahead = deque()
+
+    def peek(self, offset=0):
+        lookahead = self.lookahead
+        if offset < len(lookahead):
+            return lookahead[offset]
+        if not lookahead:
+            # Очередь пуста, значит, eof ещё не прочитан.
+            token = self.next_token()
+            lookahead.append(token)
+            if not offset:
+                return token
+        while len(lookahead) <= offset:
+            if lookahead[-1][0] == 'eof':
+                return lookahead[-1]
+            lookahead.append(self.next_token())
+        return lookahead[offset]
+
+    def advance(self):
+        lookahead = self.lookahead
+        token = lookahead[0] if lookahead else self.peek()
+        if token[0] != 'eof':
+            lookahead.popleft()
+        return token
+
+    def skip(self, kinds, offset=0):
+        while self.peek(offset)[0] in kinds:
+            offset += 1
+        return offset
+
+    def skip_blank(self):
+        return self.skip_spaces(('space', 'newline', 'comment'))
+
+    def expect(self, kind, message):
+        token = self.peek()
+        if token[0] != kind:
+            raise TranslationError(message, token[2])
+        return self.advance()
+
+    def parse(self):
+        """Узлы документа по одному. Текст между конструкциями копится до
+        перевода строки или следующего узла и отдаётся узлом Text."""
+        text = []
+        lookahead = self.lookahead
+        # Лексемы верхнего уровня запрашиваются у tokenize через send(True)
+        # (см. TOP_TOKEN_PATTERN); у списка лексем send нет. Первая лексема
+        # запускает генератор.
+        send = getattr(self.tokens, 'send', None)
+        self.peek()
+        while True:
+            if lookahead:
+                token = lookahead[0]
+            elif send is not None:
+                token = send(True)
+                lookahead.append(token)
+            else:
+                token = self.peek()
+            kind, value, _ = token
+            if kind == 'eof':
+                break
+            if kind == 'block_comment':
+                if text:
+                    yield Text(''.join(text))
+                    text = []
+                yield from self.block_comment()
+                continue
+            node = self.statement(token) if kind in STATEMENT_KINDS or value in KEYWORDS else None
+            if node is None:
+                text.append(value)
+                lookahead.popleft()
+                if kind != 'newline' and '\n' not in value:
+                    continue
+            if text:
+                yield Text(''.join(text))
+                text = []
+            if node is not None:
+                yield node
+        if text:
+            yield Text(''.join(text))
+
+    def statement(self, token):
+        kind, value, line = token
+        if kind == 'comment':
+            self.advance()
+            return Comment(value[2:])
+        if kind == 'expr_open':
+            return Expression(self.expression_block(), line)
+        if kind == 'name' and value == 'set' and self.at_constant():
+            return self.constant()
+        if kind == 'name' and value == 'dict' and self.peek(self.skip(('space', 'newline'), 1))[1] == '(':
+            return self.dictionary()
+        return None
+
+    def block_comment(self):
+        self.advance()
+        return comment_nodes(self.comment_lines())
+
+    def comment_lines(self):
+        """Строки комментария из лексем comment_text, которые могут
+        содержать несколько строк или часть строки."""
+        tail = []
+        while True:
+            kind, text, _ = self.advance()
+            if kind == 'comment_end':
+                yield ''.join(tail)
+                return
+            lines = text.split('\n')
+            tail.append(lines[0])
+            if len(lines) > 1:
+                yield ''.join(tail)
+                yield from lines[1:-1]
+                tail = [lines[-1]]
+
+    def at_constant(self):
+        if self.peek(1)[0] != 'space':
+            return False
+        offset = self.skip(('space',), 1)
+        if self.peek(offset)[0] != 'name':
+            return False
+        return self.peek(offset + 1)[0] == 'assign'
+
+    def constant(self):
+        line = self.advance()[2]
+        self.skip_spaces()
+        name = self.advance()[1]
+        self.advance()
+        return Constant(name, self.value(line), line)
+
+    def skip_spaces(self, kinds=('space',)):
+        """Пропускает лексемы видов kinds и возвращает следующую."""
+        lookahead = self.lookahead
+        while True:
+            token = lookahead[0] if lookahead else self.peek()
+            if token[0] not in kinds:
+                return token
+            lookahead.popleft()
+
+    def dictionary(self):
+        line = self.advance()[2]
+        self.skip_blank()
+        self.advance()
+        entries = []
+        keys = set()
+        if self.skip_blank()[1] == ')':
+            self.advance()
+            return Dict(entries, line)
+        while True:
+            kind, key, key_line = self.skip_blank()
+            self.advance()
+            if kind != 'name':
+                raise TranslationError(f"ожидалось имя ключа в dict(, получено {shown(kind, key)!r}", key_line)
+            if key in keys:
+                raise TranslationError(f"повторяющийся ключ {key} в dict(", key_line)
+            keys.add(key)
+            self.expect('assign', f"ожидался символ = после ключа {key}")
+            entries.append((key, self.value(line, 'dict(')))
+            if self.advance()[1] == ')':
+                return Dict(entries, line)
+
+    def array(self):
+        line = self.advance()[2]
+        self.advance()
+        elements = []
+        self.skip_blank()
+        if self.peek()[:2] == ('punct', ')'):
+            self.advance()
+            return Array(elements, line)
+        while True:
+            elements.append(self.value(line, '#('))
+            if self.advance()[1] == ')':
+                return Array(elements, line)
+
+    def value(self, line, context=None):
+        """Значение set, элемента dict или массива: выражение .[ ].,
+        вложенный dict(...), массив #(...), литерал, ссылка $имя$ или
+        произвольный текст. Значение set заканчивается с концом строки,
+        а внутри скобок (context — "dict(" или "#(") — запятой или
+        скобкой того же уровня."""
+        blank = ('space', 'newline', 'comment') if context else ('space',)
+        token = self.skip_spaces(blank)
+        kind, text, _ = token
+        if kind in SCALAR_KINDS and not (kind == 'name' and text == 'dict'):
+            # Частый случай — значение из одной лексемы, сразу за которой
+            # идёт конец значения; результат тот же, что у literal().
+            end_kind, end_text, _ = self.peek(1)
+            if (end_kind == 'punct' and end_text in (',', ')')) if context else end_kind in VALUE_END:
+                self.advance()
+                return scalar(text, token[2])
+        structured = None
+        if kind == 'expr_open':
+            structured = self.expression_block()
+        elif kind == 'name' and text == 'dict' and self.peek(self.skip(('space', 'newline'), 1))[:2] == ('punct', '('):
+            structured = self.dictionary()
+        elif (kind, text) == ('text', '#') and self.peek(1)[:2] == ('punct', '('):
+            structured = self.array()
+        if structured is not None:
+            self.skip_spaces(blank)
+            self.expect_value_end(line, context)
+            return structured
+        tokens = []
+        depth = 0
+        while True:
+            kind, text, _ = self.peek()
+            if not context:
+                if kind in ('newline', 'comment', 'eof'):
+                    break
+            elif kind == 'eof':
+                raise TranslationError(f"незакрытый {context}", line)
+            elif kind == 'comment':
+                self.advance()
+                continue
+            elif kind == 'punct':
+                if depth == 0 and text in (',', ')'):
+                    break
+                if text == '(':
+                    depth += 1
+                elif text == ')':
+                    depth -= 1
+            tokens.append(self.advance())
+        return literal(tokens)
+
+    def expect_value_end(self, line, context):
+        kind, text, token_line = self.peek()
+        if not context:
+            if kind not in ('newline', 'comment', 'eof'):
+                raise TranslationError(f"лишний текст {text!r} после значения", token_line)
+        elif kind == 'eof':
+            raise TranslationError(f"незакрытый {context}", line)
+        elif kind != 'punct' or text not in (',', ')'):
+            raise TranslationError(f"лишний текст {text!r} после значения", token_line)
+
+    def expression_block(self):
+        self.advance()
+        expression = self.expression()
+        self.skip_spaces(EXPRESSION_BLANK)
+        kind, text, line = self.advance()
+        if (kind, text) != ('operator', ']'):
+            raise TranslationError("ожидалась ] в конце выражения .[", line)
+        if self.peek()[:2] == ('text', '.'):
+            self.advance()
+        return expression
+
+    def expression(self):
+        left = self.term()
+        while True:
+            self.skip_spaces(EXPRESSION_BLANK)
+            kind, text, line = self.peek()
+            if kind != 'operator' or text not in ('+', '-'):
+                return left
+            self.advance()
+            left = Binary(text, left, self.term(), line)
+
+    def term(self):
+        left = self.unary()
+        while True:
+            self.skip_spaces(EXPRESSION_BLANK)
+            kind, text, line = self.peek()
+            if kind != 'operator' or text != '*':
+                return left
+            self.advance()
+            left = Binary(text, left, self.unary(), line)
+
+    def unary(self):
+        self.skip_spaces(EXPRESSION_BLANK)
+        kind, text, line = self.peek()
+        if kind == 'operator' and text == '-':
+            self.advance()
+            return Unary(text, self.unary(), line)
+        return self.primary()
+
+    def primary(self):
+        kind, text, line = self.advance()
+        if kind == 'number':
+            return Literal(number(text), text)
+        if kind == 'string':
+            try:
+                return Literal(string_value(text), text)
+            except ValueError as error:
+                raise TranslationError(str(error), line)
+        if kind == 'ref':
+            return Name(text[1:-1], line)
+        if kind == 'name' and text in BOOLEANS:
+            return Literal(BOOLEANS[text], text)
+        if kind == 'name':
+            self.skip_spaces(EXPRESSION_BLANK)
+            if self.peek()[:2] != ('punct', '('):
+                return Name(text, line)
+            self.advance()
+            arguments = []
+            self.skip_spaces(EXPRESSION_BLANK)
+            if self.peek()[:2] == ('punct', ')'):
+                self.advance()
+                return Call(text, arguments, line)
+            while True:
+                arguments.append(self.expression())
+                self.skip_spaces(EXPRESSION_BLANK)
+                separator = self.advance()
+                if separator[:2] == ('punct', ')'):
+                    return Call(text, arguments, line)
+                if separator[:2] != ('punct', ','):
+                    raise TranslationError(f"ожидалась , или ) в вызове {text}(", separator[2])
+        if (kind, text) == ('punct', '('):
+            expression = self.expression()
+            self.skip_spaces(EXPRESSION_BLANK)
+            if self.advance()[:2] != ('punct', ')'):
+                raise TranslationError("ожидалась ) в выражении", line)
+            return expression
+        if kind == 'eof':
+            raise TranslationError("незакрытое выражение .[", line)
+        raise TranslationError(f"неожиданный символ {shown(kind, text)!r} в выражении", line)
+
+
+EXPRESSION_BLANK = ('space', 'newline')
+SCALAR_KINDS = ('number', 'string', 'ref', 'name')
+VALUE_END = ('newline', 'comment', 'eof')
+
+
+BOOLEANS = {'true': True, 'false': False}
+
+
+def shown(kind, text):
+    """Текст лексемы для сообщения об ошибке: у = без пробелов вокруг."""
+    return '=' if kind == 'assign' else text
+
+
+def number(text):
+    return float(text) if '.' in text else int(text)
+
+
+# Экранирования в строках — как в базовых строках TOML.
+ESCAPES = {'b': '\b', 't': '\t', 'n': '\n', 'f': '\f', 'r': '\r', '"': '"', "'": "'", '\\': '\\'}
+ESCAPE_PATTERN = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.?))')
+
+
+def unescape(match):
+    code = match.group(1) or match.group(2)
+    if code is None:
+        return ESCAPES[match.group(3)]
+    code = int(code, 16)
+    if 0xD800 <= code <= 0xDFFF or code > 0x10FFFF:
+        raise KeyError(match.group())
+    return chr(code)
+
+
+def string_value(text):
+    """Значение строки в кавычках. Неизвестное или неполное экранирование
+    (например, путь C:\\Users) вызывает ValueError."""
+    body = text[1:-1]
+    if '\\' not in body:
+        return body
+    try:
+        return ESCAPE_PATTERN.sub(unescape, body)
+    except KeyError:
+        raise ValueError(f"недопустимое экранирование в строке {text}") from None
+
+
+def scalar(text, line):
+    """Значение из одной лексемы: число (возможно, с минусом), строка,
+    ссылка $имя$, логическое значение или имя, которое остаётся текстом."""
+    first = text[0]
+    if first == '"' or first == "'":
+        try:
+            return Literal(string_value(text), text)
+        except ValueError:
+            # Строка с неизвестными экранированиями переносится как есть.
+            return Raw(text)
+    if first == '$':
+        return Name(text[1:-1], line)
+    if first == '-' or '0' <= first <= '9':
+        return Literal(number(text), text)
+    if text in BOOLEANS:
+        return Literal(BOOLEANS[text], text)
+    return Raw(text)
+
+
+def literal(tokens):
+    """Значение из лексем: число, строка, ссылка $имя$ или, если это
+    не одна из них, исходный текст без изменений."""
+    text = ''.join(token[1] for token in tokens).strip()
+    significant = [token for token in tokens if token[0] not in ('space', 'newline')]
+    kinds = [token[0] for token in significant]
+    if kinds == ['operator', 'number'] and significant[0][1] == '-':
+        return Literal(-number(significant[1][1]), text)
+    if len(kinds) == 1 and kinds[0] in ('number', 'string', 'ref', 'name'):
+        return scalar(text, significant[0][2])
+    return Raw(text)
+
+
+def dependencies(expression):
+    """Имена констант, на которые ссылается выражение."""
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Name):
+            yield node.name
+        elif isinstance(node, Unary):
+            stack.append(node.operand)
+        elif isinstance(node, Binary):
+            stack.extend((node.right, node.left))
+        elif isinstance(node, Call):
+            stack.extend(reversed(node.arguments))
+        elif isinstance(node, Array):
+            stack.extend(reversed(node.elements))
+        elif isinstance(node, Dict):
+            stack.extend(value for _, value in reversed(node.entries))
+
+
+OPERATORS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+}
+FUNCTIONS = {'max': max}
+
+
+def operand(value, line):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TranslationError(f"значение {format_value(value)} не является числом или строкой", line)
+    return value
+
+
+def evaluate(expression, constants):
+    kind = type(expression)
+    if kind is Literal:
+        return expression.value
+    if kind is Raw:
+        return expression
+    if kind is Name:
+        return constants.value(expression.name, expression.line)
+    if kind is Array:
+        return [evaluate(element, constants) for element in expression.elements]
+    if kind is Dict:
+        return {key: evaluate(value, constants) for key, value in expression.entries}
+    line = expression.line
+    try:
+        if kind is Unary:
+            return -operand(evaluate(expression.operand, constants), line)
+        if kind is Binary:
+            left = operand(evaluate(expression.left, constants), line)
+            right = operand(evaluate(expression.right, constants), line)
+            return OPERATORS[expression.operator](left, right)
+        function = FUNCTIONS.get(expression.function)
+        if function is None:
+            raise TranslationError(f"неизвестная функция {expression.function}()", line)
+        return function(*[operand(evaluate(argument, constants), line) for argument in expression.arguments])
+    except TypeError:
+        raise TranslationError("недопустимые типы операндов в выражении", line)
+
+
+class ConstantTable:
+    """Таблица констант документа с графом зависимостей между ними.
+
+    Константа вычисляется при первом обращении: её зависимости обходятся
+    в глубину без рекурсии, и константы вычисляются в топологическом
+    порядке (сначала зависимости). Результаты запоминаются, поэтому каждая
+    константа вычисляется один раз, а общее время линейно по числу
+    констант и ссылок. Повторный вход в константу на текущем пути обхода
+    означает цикл.
+    """
+
+    def __init__(self):
+        self.declarations = {}
+        self.values = {}
+
+    def declare(self, name, expression, line):
+        declared = self.declarations.get(name)
+        if declared is not None:
+            if declared[1] != line:
+                raise TranslationError(f"константа {name} уже объявлена в строке {declared[1]}", line)
+            return
+        # У литералов (самый частый случай) зависимостей нет.
+        simple = type(expression) is Literal or type(expression) is Raw
+        self.declarations[name] = (expression, line, () if simple else tuple(dependencies(expression)))
+
+    def value(self, name, line):
+        if name in self.values:
+            return self.values[name]
+        declaration = self.declarations.get(name)
+        if declaration is None:
+            raise UndefinedConstant(name, line)
+        if not declaration[2]:
+            value = self.values[name] = evaluate(declaration[0], self)
+            return value
+        stack = [(name, iter(declaration[2]))]
+        path = {name}
+        while stack:
+            current, pending = stack[-1]
+            for dependency in pending:
+                if dependency in self.values:
+                    continue
+                if dependency in path:
+                    cycle = [entry[0] for entry in stack]
+                    cycle = cycle[cycle.index(dependency):] + [dependency]
+                    raise TranslationError(f"циклическая зависимость констант: {' -> '.join(cycle)}",
+                                           self.declarations[dependency][1])
+                if dependency not in self.declarations:
+                    raise UndefinedConstant(dependency, self.declarations[current][1])
+                path.add(dependency)
+                stack.append((dependency, iter(self.declarations[dependency][2])))
+                break
+            else:
+                stack.pop()
+                path.discard(current)
+                self.values[current] = evaluate(self.declarations[current][0], self)
+        return self.values[name]
+
+
+class LineWriter:
+    """Единый буферизованный вывод. Фрагменты копятся как есть (add — это
+    append списка) и после каждого узла, если их набралось BUFFER_FRAGMENTS,
+    обрабатываются одной порцией: текст режется на строки, пробелы по краям
+    строк обрезаются, пустые строки пропускаются, а результат передаётся в
+    write. Незаконченная строка ждёт следующей порции по кускам, поэтому
+    длинная строка не копируется при каждой порции."""
+
+    def __init__(self, write):
+        self.write = write
+        self.fragments = []
+        self.add = self.fragments.append
+        self.line = []
+        self.empty = True
+
+    def check(self):
+        if len(self.fragments) >= BUFFER_FRAGMENTS:
+            self.flush()
+
+    def flush(self, final=False):
+        text = ''.join(self.fragments)
+        self.fragments.clear()
+        if not final and '\n' not in text:
+            self.line.append(text)
+            return
+        lines = text.split('\n')
+        if self.line:
+            self.line.append(lines[0])
+            lines[0] = ''.join(self.line)
+        self.line = [] if final else [lines.pop()]
+        output = '\n'.join(filter(None, map(str.strip, lines)))
+        if output:
+            self.write(output if self.empty else '\n' + output)
+            self.empty = False
+
+    def close(self):
+        self.flush(final=True)
+
+
+def format_value(value):
+    if isinstance(value, (Raw, Literal)):
+        return value.text
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, float):
+        # 15 значащих цифр убирают погрешность двоичного представления
+        # (0.1 + 0.2 = 0.3), а TOML требует точку у дробных чисел.
+        text = f"{value:.15g}"
+        return text if any(char in text for char in '.ein') else f"{text}.0"
+    return str(value)
+
+
+def output_value(value, constants):
+    """Значение для вывода: выражения и ссылки вычисляются, а литералы и
+    произвольный текст остаются узлами и выводятся в исходной записи."""
+    kind = type(value)
+    if kind is Literal or kind is Raw:
+        return value
+    if kind is Array:
+        return [output_value(element, constants) for element in value.elements]
+    if kind is Dict:
+        return {key: output_value(item, constants) for key, item in value.entries}
+    return evaluate(value, constants)
+
+
+def write_value(writer, value):
+    """Пишет значение в строку TOML: массивы — [ ], словари — встроенными
+    таблицами { }. Фрагменты идут прямо в writer без промежуточных строк."""
+    if isinstance(value, list):
+        writer.add('[')
+        for index, element in enumerate(value):
+            if index:
+                writer.add(', ')
+            write_value(writer, element)
+        writer.add(']')
+    elif isinstance(value, dict):
+        if not value:
+            writer.add('{}')
+            return
+        writer.add('{ ')
+        for index, (key, item) in enumerate(value.items()):
+            if index:
+                writer.add(', ')
+            writer.add(f"{key} = ")
+            write_value(writer, item)
+        writer.add(' }')
+    else:
+        writer.add(format_value(value))
+
+
+def write_table(writer, table):
+    """Словарь верхнего уровня — элемент массива таблиц [[dict]]; вложенные
+    словари пишутся в нём точечными ключами (ключ.ключ = значение) в порядке
+    элементов. Подтаблица [dict.ключ] захватила бы ключи верхнего уровня,
+    идущие после словаря."""
+    writer.add("[[dict]]")
+    stack = [("", iter(table.items()))]
+    while stack:
+        prefix, entries = stack[-1]
+        for key, value in entries:
+            kind = type(value)
+            if kind is Literal or kind is Raw:
+                writer.add(f"\n{prefix}{key} = {value.text}")
+            elif kind is dict and value:
+                stack.append((f"{prefix}{key}.", iter(value.items())))
+                break
+            else:
+                writer.add(f"\n{prefix}{key} = ")
+                write_value(writer, value)
+        else:
+            stack.pop()
+
+
+def write_node(writer, node, constants):
+    kind = type(node)
+    if kind is Text:
+        writer.add(node.text)
+    elif kind is Constant:
+        constants.declare(node.name, node.value, node.line)
+        value = node.value
+        if type(value) is Literal or type(value) is Raw:
+            writer.add(f"{node.name} = {value.text}")
+        else:
+            writer.add(f"{node.name} = ")
+            write_value(writer, constants.value(node.name, node.line))
+    elif kind is Dict:
+        write_table(writer, output_value(node, constants))
+    elif kind is Comment:
+        writer.add(f"#{node.text}")
+    elif kind is BlockComment:
+        writer.add(f"# {node.text}")
+    else:
+        write_value(writer, output_value(node.expression, constants))
+
+
+def declare_constants(nodes, constants):
+    for node in nodes:
+        if isinstance(node, Constant):
+            constants.declare(node.name, node.value, node.line)
+    return constants
+
+
+def write_nodes(nodes, write, constants):
+    writer = LineWriter(write)
+    for node in nodes:
+        write_node(writer, node, constants)
+        writer.check()
+    writer.close()
+
+
+def translate(tokens, write, constants=None):
+    """Разбирает поток лексем и пишет результат через write по мере разбора.
+
+    Без готовой таблицы constants константы объявляются по ходу разбора,
+    и ссылка на ещё не объявленную константу вызывает UndefinedConstant;
+    тогда нужен второй проход с таблицей, заполненной declare_constants.
+    """
+    write_nodes(Parser(tokens).parse(), write, ConstantTable() if constants is None else constants)
+
 
 def transform_input_text(input_text):
-    processed_lines = []
-    variable_map = {}
+    """Преобразует текст целиком. Обычно хватает одного прохода, как в
+    translate; если он завершился ошибкой (в том числе из-за ссылки на
+    константу, объявленную ниже), текст разбирается заново: сначала все
+    объявления, затем вывод, и ошибка сообщается в порядке этого разбора."""
+    output = []
+    try:
+        translate(tokenize(input_text), output.append)
+        return "".join(output)
+    except TranslationError:
+        pass
+    nodes = list(Parser(tokenize(input_text)).parse())
+    output = []
+    write_nodes(nodes, output.append, declare_constants(nodes, ConstantTable()))
+    return "".join(output)
+
+
+class Translator:
+    """Транслятор для долгоживущих процессов с кэшем результатов.
+
+    Шаблоны лексера компилируются один раз при импорте модуля, а готовые
+    документы хранятся в LRU-кэше по хэшу BLAKE2 их текста, поэтому
+    повторное преобразование неизменённой конфигурации стоит одного
+    хэширования. Кэш ограничен числом документов (max_entries) и суммарной
+    длиной результатов в символах (max_size); при превышении вытесняются
+    давно не использованные. Ошибки не кэшируются. Методы можно вызывать
+    из нескольких потоков.
+    """
+
+    def __init__(self, max_entries=256, max_size=64 << 20):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def translate(self, text):
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        with self.lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = transform_input_text(text)
+        with self.lock:
+            if key not in self.cache and len(result) <= self.max_size:
+                self.cache[key] = result
+                self.size += len(result)
+                while len(self.cache) > self.max_entries or self.size > self.max_size:
+                    _, evicted = self.cache.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return result
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.cache),
+                'size': self.size,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.size = 0
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    return iter(partial(file.read, chunk_size), '')
+
+
+def translate_file(input_file_path, output_file_path, chunk_size=CHUNK_SIZE):
+    """Потоковое преобразование файла: вход читается кусками, результат
+    пишется по мере разбора во временный файл, который при успехе заменяет
+    выходной, поэтому при ошибке выходной файл не портится. Если константа
+    используется раньше объявления, файл читается ещё дважды: для сбора
+    объявлений и для вывода."""
+    temp_path = f"{output_file_path}.tmp"
+    try:
+        try:
+            with open(input_file_path, 'r', encoding='utf-8') as input_file, \
+                    open(temp_path, 'w', encoding='utf-8') as output_file:
+                translate(tokenize(read_chunks(input_file, chunk_size)), output_file.write)
+        except UndefinedConstant:
+            # Ссылка вперёд: сначала собираются все объявления set.
+            with open(input_file_path, 'r', encoding='utf-8') as input_file:
+                constants = declare_constants(Parser(tokenize(read_chunks(input_file, chunk_size))).parse(),
+                                              ConstantTable())
+            with open(input_file_path, 'r', encoding='utf-8') as input_file, \
+                    open(temp_path, 'w', encoding='utf-8') as output_file:
+                translate(tokenize(read_chunks(input_file, chunk_size)), output_file.write, constants)
+        os.replace(temp_path, output_file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
-    input_text = re.sub(r'::', '#', input_text)
 
-    def replace_multiline_comment(match):
-        comment_content = match.group(1).strip()
-        return "\n".join([f"# {line}" for line in comment_content.splitlines()])
-    
-    input_text = re.sub(r'--\[\[(.*?)\]\]', replace_multiline_comment, input_text, flags=re.DOTALL)
+def file_hash(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(partial(file.read, chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    def process_constant(match):
-        constant_name = match.group(1).strip()
-        constant_value = match.group(2).strip()
-        variable_map[constant_name] = constant_value
-        return f"{constant_name} = {constant_value}"
 
-    input_text = re.sub(r'set\s+([a-zA-Z_][a-zA-Z0-9]*)\s*=\s*(.*)', process_constant, input_text)
+def collect_inputs(paths, output_dir=None, pattern='*.txt'):
+    """Пары (вход, выход) для каталогов, шаблонов glob и отдельных файлов.
 
-    def handle_dict(match):
-        dict_entries = match.group(1).split(',')
-        dict_representation = "[[dict]]\n"
-        for entry in dict_entries:
-            key, value = entry.split('=', 1)
-            key = key.strip()
-            value = value.strip()
+    Выходной файл получает расширение .toml и пишется рядом с входным,
+    а если задан output_dir — в то же относительное место внутри него.
+    """
+    pairs = {}
+    for path in paths:
+        if os.path.isdir(path):
+            base = path
+            files = glob.glob(os.path.join(glob.escape(path), '**', pattern), recursive=True)
+        elif glob.has_magic(path):
+            parts = path.split(os.sep)
+            magic = next(index for index, part in enumerate(parts) if glob.has_magic(part))
+            base = os.sep.join(parts[:magic])
+            files = glob.glob(path, recursive=True)
+        else:
+            base = os.path.dirname(path)
+            files = [path]
+        for input_path in sorted(files):
+            if not os.path.isfile(input_path):
+                continue
+            output_path = os.path.splitext(input_path)[0] + '.toml'
+            if output_dir is not None:
+                output_path = os.path.join(output_dir, os.path.relpath(output_path, base or '.'))
+            pairs.setdefault(input_path, output_path)
+    return list(pairs.items())
 
-            if value.startswith("$") and value.endswith("$"):
-                value = variable_map.get(value[1:-1], value)
 
-            dict_representation += f"{key} = {value}\n"
-        return dict_representation.strip()
+def translate_task(task):
+    """Задача пула: преобразует файл, если его содержимое изменилось.
+
+    Возвращает (вход, статус, хэш, размер, сообщение); ошибки не выбрасываются,
+    чтобы одна неудачная конфигурация не останавливала остальные.
+    """
+    input_path, output_path, previous_hash = task
+    try:
+        digest = file_hash(input_path)
+        size = os.path.getsize(input_path)
+        if digest == previous_hash and os.path.exists(output_path):
+            return input_path, 'skipped', digest, size, None
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        translate_file(input_path, output_path)
+        return input_path, 'translated', digest, size, None
+    except Exception as error:
+        return input_path, 'failed', None, 0, str(error)
+
+
+def load_state(state_path):
+    if not state_path or not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_state(state_path, state):
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temp_path, state_path)
+
+
+def translate_batch(paths, output_dir=None, jobs=None, state_path=STATE_PATH, pattern='*.txt'):
+    """Параллельно преобразует все найденные файлы пулом процессов.
+
+    Хэши содержимого успешно преобразованных файлов сохраняются в
+    state_path, и при следующем запуске неизменённые файлы пропускаются.
+    Возвращает словарь со сводкой.
+    """
+    start = time.perf_counter()
+    state = load_state(state_path)
+    tasks = [(input_path, output_path, state.get(input_path))
+             for input_path, output_path in collect_inputs(paths, output_dir, pattern)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) < 2:
+        results = list(map(translate_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            results = list(executor.map(translate_task, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+    summary = {'files': len(results), 'translated': 0, 'skipped': 0, 'failed': 0, 'bytes': 0, 'errors': []}
+    for input_path, status, digest, size, message in results:
+        summary[status] += 1
+        if status == 'failed':
+            state.pop(input_path, None)
+            summary['errors'].append((input_path, message))
+        else:
+            state[input_path] = digest
+        if status == 'translated':
+            summary['bytes'] += size
+    if state_path:
+        save_state(state_path, state)
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def print_summary(summary):
+    megabytes = summary['bytes'] / 2**20
+    print(f"Файлов: {summary['files']}, преобразовано: {summary['translated']}, "
+          f"пропущено без изменений: {summary['skipped']}, с ошибками: {summary['failed']}")
+    print(f"Обработано {megabytes:.2f} МБ за {summary['seconds']:.2f} с "
+          f"({megabytes / max(summary['seconds'], 1e-9):.2f} МБ/с)")
+    for input_path, message in summary['errors']:
+        print(f"Ошибка в файле '{input_path}': {message}")
+
+
+def process_batch(argv):
+    parser = argparse.ArgumentParser(prog='main.py --batch',
+                                     description="Пакетное преобразование конфигураций")
+    parser.add_argument('paths', nargs='+', help="файлы, каталоги или шаблоны glob")
+    parser.add_argument('--output-dir', help="каталог для зеркального дерева выходных файлов")
+    parser.add_argument('--jobs', type=int, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument('--state', default=STATE_PATH, help="файл с хэшами прошлого запуска")
+    parser.add_argument('--pattern', default='*.txt', help="шаблон имён файлов в каталогах")
+    args = parser.parse_args(argv)
+    summary = translate_batch(args.paths, args.output_dir, args.jobs, args.state, args.pattern)
+    print_summary(summary)
+    return summary
+
+
+# Пустые строки, перед которыми не стоит dict: "dict\n\n(...)" — один словарь.
+BLOCK_SEPARATOR = re.compile(r'(?<![ \t\r\f\v\n])(?<!dict)[ \t\r\f\v]*\n(?:[ \t\r\f\v]*\n)+')
+
+
+def split_blocks(text):
+    """Блоки верхнего уровня — фрагменты текста между пустыми строками;
+    разделитель остаётся в конце предыдущего блока."""
+    start = 0
+    for match in BLOCK_SEPARATOR.finditer(text):
+        yield text[start:match.end()]
+        start = match.end()
+    if start < len(text):
+        yield text[start:]
 
-    input_text = re.sub(r'dict\((.*?)\)', handle_dict, input_text, flags=re.DOTALL)
 
-    for line in input_text.splitlines():
-        stripped_line = line.strip()
-        if stripped_line:
-            processed_lines.append(stripped_line)
+def shift_lines(value, delta):
+    """Копия узла или значения с номерами строк, сдвинутыми на delta."""
+    if isinstance(value, list):
+        return [shift_lines(item, delta) for item in value]
+    if not isinstance(value, tuple):
+        return value
+    items = [shift_lines(item, delta) for item in value]
+    fields = getattr(value, '_fields', None)
+    if fields is None:
+        return tuple(items)
+    if 'line' in fields:
+        items[fields.index('line')] += delta
+    return type(value)(*items)
 
-    return "\n".join(processed_lines)
+
+def translate_blocks(text, cache):
+    """Преобразует текст, разбирая заново только блоки, которых нет в cache.
+
+    cache — словарь хэш блока -> (номер первой строки, узлы) из прошлой
+    версии документа; блок, сдвинутый правкой выше, берётся из кэша со
+    сдвинутыми номерами строк. Каждый блок разбирается с его настоящего
+    номера строки, поэтому результат и сообщения об ошибках совпадают с
+    transform_input_text. Возвращает (результат, словарь блоков текущей
+    версии, число разобранных блоков). Константы объявляются и вычисляются
+    по всему документу заново, так что изменение set в одном блоке влияет
+    на остальные как обычно. Блок, разрезающий dict(...) или комментарий
+    пустой строкой, вызывает TranslationError; тогда нужен полный разбор.
+    """
+    blocks = {}
+    nodes = []
+    parsed = 0
+    line = 1
+    for block in split_blocks(text):
+        key = hashlib.blake2b(block.encode('utf-8'), digest_size=16).digest()
+        cached = blocks.get(key) or cache.get(key)
+        if cached is None:
+            block_nodes = list(Parser(tokenize(block, line)).parse())
+            parsed += 1
+        elif cached[0] != line:
+            block_nodes = shift_lines(cached[1], line - cached[0])
+        else:
+            block_nodes = cached[1]
+        # Одинаковые блоки в разных местах хранятся под одним ключом; в кэше
+        # остаётся последний из них.
+        blocks[key] = (line, block_nodes)
+        nodes.extend(block_nodes)
+        line += block.count('\n')
+    output = []
+    write_nodes(nodes, output.append, declare_constants(nodes, ConstantTable()))
+    return ''.join(output), blocks, parsed
+
+
+class Watcher:
+    """Следит за входными файлами и преобразует их заново при изменении.
+
+    Изменения находятся опросом времени изменения и размера файлов раз в
+    interval секунд; новые файлы в отслеживаемых каталогах подхватываются
+    при следующем опросе. Для каждого файла хранятся разобранные блоки
+    прошлой версии, и после правки разбираются только изменённые блоки.
+    Результат пишется во временный файл и переносится на место выходного
+    через os.replace, поэтому читатели не видят недописанный TOML, а при
+    ошибке остаётся прошлый результат.
+    """
+
+    def __init__(self, paths, output_dir=None, pattern='*.txt', interval=0.5):
+        self.paths = paths
+        self.output_dir = output_dir
+        self.pattern = pattern
+        self.interval = interval
+        self.mtimes = {}
+        self.blocks = {}
+
+    def changed(self):
+        """Пары (вход, выход) для новых и изменённых с прошлого опроса файлов."""
+        mtimes = {}
+        changed = []
+        for input_path, output_path in collect_inputs(self.paths, self.output_dir, self.pattern):
+            try:
+                stat = os.stat(input_path)
+            except OSError:
+                continue
+            mtimes[input_path] = (stat.st_mtime_ns, stat.st_size)
+            if self.mtimes.get(input_path) != mtimes[input_path]:
+                changed.append((input_path, output_path))
+        for removed in self.mtimes.keys() - mtimes.keys():
+            self.blocks.pop(removed, None)
+        self.mtimes = mtimes
+        return changed
+
+    def translate(self, input_path, output_path):
+        """Преобразует файл и возвращает (разобрано блоков, всего блоков)."""
+        with open(input_path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        try:
+            output, blocks, parsed = translate_blocks(text, self.blocks.get(input_path, {}))
+        except TranslationError:
+            # Полный разбор даёт верный результат, если пустая строка оказалась
+            # внутри конструкции, и верные номера строк в сообщении об ошибке.
+            self.blocks.pop(input_path, None)
+            translate_file(input_path, output_path)
+            return 1, 1
+        self.blocks[input_path] = blocks
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(output)
+        os.replace(temp_path, output_path)
+        return parsed, len(blocks)
+
+    def poll(self):
+        """Один опрос: список (вход, выход, разобрано, всего, сообщение об ошибке)."""
+        results = []
+        for input_path, output_path in self.changed():
+            try:
+                parsed, total = self.translate(input_path, output_path)
+                results.append((input_path, output_path, parsed, total, None))
+            except Exception as error:
+                results.append((input_path, output_path, 0, 0, str(error)))
+        return results
+
+    def run(self):
+        while True:
+            for input_path, output_path, parsed, total, message in self.poll():
+                if message is None:
+                    print(f"Файл '{input_path}' преобразован в '{output_path}' "
+                          f"(разобрано блоков: {parsed} из {total}).")
+                else:
+                    print(f"Ошибка в файле '{input_path}': {message}")
+            time.sleep(self.interval)
+
+
+def process_watch(argv):
+    parser = argparse.ArgumentParser(prog='main.py --watch',
+                                     description="Преобразование конфигураций при каждом изменении")
+    parser.add_argument('paths', nargs='+', help="файлы, каталоги или шаблоны glob")
+    parser.add_argument('--output-dir', help="каталог для зеркального дерева выходных файлов")
+    parser.add_argument('--pattern', default='*.txt', help="шаблон имён файлов в каталогах")
+    parser.add_argument('--interval', type=float, default=0.5, help="период опроса в секундах")
+    args = parser.parse_args(argv)
+    try:
+        Watcher(args.paths, args.output_dir, args.pattern, args.interval).run()
+    except KeyboardInterrupt:
+        pass
 
 
 def process_files():
+    if sys.argv[1:2] == ['--batch']:
+        process_batch(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['--watch']:
+        process_watch(sys.argv[2:])
+        return
+
     if len(sys.argv) < 3:
         print("Ошибка: недостаточно аргументов. Пожалуйста, укажите пути к исходному и выходному файлам.")
         return
@@ -54,14 +1292,7 @@ def process_files():
     output_file_path = sys.argv[2]
 
     try:
-        with open(input_file_path, 'r', encoding='utf-8') as input_file:
-            content = input_file.read()
-
-        transformed_content = transform_input_text(content)
-
-        with open(output_file_path, 'w', encoding='utf-8') as output_file:
-            output_file.write(transformed_content)
-
+        translate_file(input_file_path, output_file_path)
         print(f"Конфигурация успешно преобразована и сохранена в файл: '{output_file_path}'.")
 
     except FileNotFoundError:
@@ -1,5 +1,10 @@
+import os
+import shutil
+import tempfile
+import tomllib
+import tracemalloc
 import unittest
-from main import transform_input_text
+from main import Translator, transform_input_text, translate, translate_file, translate_batch, translate_blocks, Watcher, tokenize, Parser, Constant, Dict, Text, Literal, Raw, Name, TranslationError
 
 class TestParseInput(unittest.TestCase):
     def test_single_line_comment(self):
@@ -32,6 +37,344 @@ class TestParseInput(unittest.TestCase):
         expected_output = "size = 100"
         self.assertEqual(transform_input_text(input_text), expected_output)
 
+    def test_strings_and_comments_are_not_rewritten(self):
+        input_text = 'url = "a::b dict(x=1)" :: dict(y=2) set z = 3'
+        expected_output = 'url = "a::b dict(x=1)" # dict(y=2) set z = 3'
+        self.assertEqual(transform_input_text(input_text), expected_output)
+
+    def test_parser_builds_ast(self):
+        nodes = list(Parser(tokenize("set user_name = 5\ndict(a = max(1, 2), b = $user_name$)\n")).parse())
+        self.assertEqual(nodes, [
+            Constant('user_name', Literal(5, '5'), 1),
+            Text('\n'),
+            Dict([('a', Raw('max(1, 2)')), ('b', Name('user_name', 2))], 2),
+            Text('\n'),
+        ])
+        self.assertEqual(
+            transform_input_text("set user_name = 5\ndict(a = max(1, 2), b = $user_name$)"),
+            "user_name = 5\n[[dict]]\na = max(1, 2)\nb = 5"
+        )
+
+    def test_top_level_lexing_matches_token_parser(self):
+        def token_by_token(text):
+            output = []
+            translate(list(tokenize(text)), output.append)
+            return "".join(output)
+
+        for input_text in (
+            "aset a = 1\n1set b = 2\nset_x = 3\nxdict(c = 1)\n2dict(d = $b$)",
+            'url = "::x" $a$ \'--[[\' .5 :: set c = 1\n--[[ a\n\n  b ]]tail',
+            'set a = 1 :: c\nset b = $a$\ndict(\n  k = "x,y", m = -2.5,\n  n = $b$)\ndict()',
+            "set a = dict(k = 1)\nset b = .[1 + 2].\ndict(a = 1, b = #(1, 2))",
+            "set x == 1\nset  y\t=\t2\ndict(a  =  $y$ )\nx = y = z",
+        ):
+            self.assertEqual(transform_input_text(input_text), token_by_token(input_text))
+        for input_text in ("dict(a = 1,\na = 2)", "set a = 1\nset a = 2", "x\ndict(a = 1,)", "dict( = 1)", ".[1 = 2]."):
+            with self.assertRaises(TranslationError) as fast:
+                transform_input_text(input_text)
+            with self.assertRaises(TranslationError) as slow:
+                token_by_token(input_text)
+            self.assertEqual(str(fast.exception), str(slow.exception))
+
+    def test_syntax_errors(self):
+        with self.assertRaisesRegex(TranslationError, "строка 2: незакрытый dict"):
+            transform_input_text("x = 1\ndict(a = 1")
+        with self.assertRaisesRegex(TranslationError, "строка 1: незакрытый многострочный"):
+            transform_input_text("--[[ comment")
+        with self.assertRaisesRegex(TranslationError, "ожидалось имя ключа"):
+            transform_input_text("dict(= 1)")
+
+    def test_constant_expressions(self):
+        input_text = (
+            "dict(total = .[base * 2 + max(1, extra, -3)]., name = .[prefix + \"-\" + \"x\" * 2].)\n"
+            "set base = .[extra - 1].\n"
+            "set extra = 4\n"
+            "set prefix = 'cfg'\n"
+            ".[(base + 1) * 0.1]."
+        )
+        expected_output = (
+            "[[dict]]\ntotal = 10\nname = \"cfg-xx\"\n"
+            "base = 3\nextra = 4\nprefix = 'cfg'\n0.4"
+        )
+        self.assertEqual(transform_input_text(input_text), expected_output)
+
+    def test_constant_errors(self):
+        with self.assertRaisesRegex(TranslationError, "строка 1: циклическая зависимость констант: a -> b -> a"):
+            transform_input_text("set a = .[b + 1].\nset b = .[a * 2].")
+        with self.assertRaisesRegex(TranslationError, "неизвестная константа c"):
+            transform_input_text("set a = .[c].")
+        with self.assertRaisesRegex(TranslationError, "строка 2: константа a уже объявлена в строке 1"):
+            transform_input_text("set a = 1\nset a = 2")
+        with self.assertRaisesRegex(TranslationError, "недопустимые типы операндов"):
+            transform_input_text("set a = .[\"x\" - 1].")
+
+    def test_string_escapes(self):
+        input_text = 'set p = "C:\\Users\\x"\nset s = "\\u12"\ndict(q = "a\\qb", t = .["a\\tb" + "\\u00e9"].)'
+        expected_output = 'p = "C:\\Users\\x"\ns = "\\u12"\n[[dict]]\nq = "a\\qb"\nt = "a\\tbé"'
+        self.assertEqual(transform_input_text(input_text), expected_output)
+        with self.assertRaisesRegex(TranslationError, "строка 2: недопустимое экранирование"):
+            transform_input_text('x = 1\nset p = .["C:\\Users" + "x"].')
+
+    def test_long_dependency_chain(self):
+        count = 20000
+        lines = [f"set c{i} = .[c{i + 1} + 1]." for i in range(count)]
+        lines.append(f"set c{count} = 0")
+        output = transform_input_text("\n".join(lines))
+        self.assertTrue(output.startswith(f"c0 = {count}\nc1 = {count - 1}\n"))
+
+    def test_nested_tables_and_arrays(self):
+        input_text = (
+            "set ports = #(80, .[base + 1], 'x')\n"
+            "set base = 442\n"
+            "dict(\n"
+            "    name = \"web, main\",\n"
+            "    limits = dict(cpu = 2, memory = dict(soft = 1.5, hard = .[2 * 2].)),\n"
+            "    enabled = true,\n"
+            "    hosts = #(\"a\", #(1, 2), dict(id = 7)),\n"
+            "    ports = $ports$\n"
+            ")"
+        )
+        expected_output = (
+            "ports = [80, 443, \"x\"]\n"
+            "base = 442\n"
+            "[[dict]]\n"
+            "name = \"web, main\"\n"
+            "limits.cpu = 2\n"
+            "limits.memory.soft = 1.5\n"
+            "limits.memory.hard = 4\n"
+            "enabled = true\n"
+            "hosts = [\"a\", [1, 2], { id = 7 }]\n"
+            "ports = [80, 443, \"x\"]"
+        )
+        self.assertEqual(transform_input_text(input_text), expected_output)
+        self.assertEqual(tomllib.loads(expected_output), {
+            "ports": [80, 443, "x"],
+            "base": 442,
+            "dict": [{
+                "name": "web, main",
+                "limits": {"cpu": 2, "memory": {"soft": 1.5, "hard": 4}},
+                "enabled": True,
+                "hosts": ["a", [1, 2], {"id": 7}],
+                "ports": [80, 443, "x"],
+            }],
+        })
+        self.assertEqual(transform_input_text("set d = dict(a = #(), b = dict())"), "d = { a = [], b = {} }")
+        # Ключи после словаря не попадают во вложенную таблицу.
+        output = transform_input_text('dict(name = "x", limits = dict(cpu = 2), empty = dict())\nset after = 5')
+        self.assertEqual(tomllib.loads(output),
+                         {"dict": [{"name": "x", "limits": {"cpu": 2}, "empty": {}, "after": 5}]})
+
+    def test_nested_value_errors(self):
+        with self.assertRaisesRegex(TranslationError, "повторяющийся ключ a"):
+            transform_input_text("dict(a = 1, a = 2)")
+        with self.assertRaisesRegex(TranslationError, "строка 1: незакрытый #\\("):
+            transform_input_text("set a = #(1, 2")
+        with self.assertRaisesRegex(TranslationError, "лишний текст"):
+            transform_input_text("dict(a = dict(b = 1) c)")
+
+    def test_chunk_boundaries(self):
+        input_text = ("set a_b = 1 :: c\n--[[ первая\n\n вторая ]] x\ndict(\n k = 'v',\n m = $a_b$\n)\n"
+                      "set c = true--[[ d\n\n e ]]")
+        expected_output = transform_input_text(input_text)
+        for size in (1, 2, 3, 7):
+            output = []
+            chunks = (input_text[i:i + size] for i in range(0, len(input_text), size))
+            translate(tokenize(chunks), output.append)
+            self.assertEqual("".join(output), expected_output)
+
+
+class TestTranslator(unittest.TestCase):
+    def test_cache_hits_and_misses(self):
+        translator = Translator()
+        self.assertEqual(translator.translate("set a = .[1 + 1]."), "a = 2")
+        self.assertEqual(translator.translate("set a = .[1 + 1]."), "a = 2")
+        self.assertEqual(translator.translate("set b = 3"), "b = 3")
+        stats = translator.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_lru_eviction(self):
+        translator = Translator(max_entries=2, max_size=12)
+        translator.translate("set a = 1")
+        translator.translate("set b = 2")
+        translator.translate("set a = 1")
+        translator.translate("set c = 3")
+        self.assertEqual(translator.stats()["evictions"], 1)
+        translator.translate("set a = 1")
+        self.assertEqual(translator.stats()["hits"], 2)
+        translator.translate("set long_name = 12345")
+        stats = translator.stats()
+        self.assertEqual((stats["entries"], stats["size"]), (2, 10))
+
+    def test_errors_are_not_cached(self):
+        translator = Translator()
+        for _ in range(2):
+            with self.assertRaises(TranslationError):
+                translator.translate("dict(a = 1")
+        self.assertEqual(translator.stats()["misses"], 2)
+        self.assertEqual(translator.stats()["entries"], 0)
+
+
+class TestTranslateFile(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.input_path = os.path.join(self.test_dir, "input.txt")
+        self.output_path = os.path.join(self.test_dir, "output.toml")
+
+    def _peak_memory(self, blocks):
+        block = "--[[\nописание\n]]\ndict(\n    name = \"item\",\n    size = $limit$\n)\n"
+        with open(self.input_path, "w", encoding="utf-8") as file:
+            file.write("set limit = 10\n")
+            for _ in range(blocks):
+                file.write(block)
+        tracemalloc.start()
+        try:
+            translate_file(self.input_path, self.output_path, chunk_size=4096)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_streaming_memory_is_bounded(self):
+        small = self._peak_memory(1000)
+        large = self._peak_memory(8000)
+        self.assertGreater(os.path.getsize(self.input_path), 512 * 1024)
+        self.assertLess(large, small * 1.25)
+        with open(self.output_path, encoding="utf-8") as file:
+            self.assertEqual(file.readline(), "limit = 10\n")
+
+    def test_forward_reference_in_file(self):
+        with open(self.input_path, "w", encoding="utf-8") as file:
+            file.write("dict(a = $later$)\nset later = .[2 * 21].")
+        translate_file(self.input_path, self.output_path, chunk_size=8)
+        with open(self.output_path, encoding="utf-8") as file:
+            self.assertEqual(file.read(), "[[dict]]\na = 42\nlater = 42")
+
+    def test_error_keeps_previous_output(self):
+        with open(self.output_path, "w", encoding="utf-8") as file:
+            file.write("old = 1")
+        with open(self.input_path, "w", encoding="utf-8") as file:
+            file.write("x = 1\n" * 1000 + "dict(a = 1")
+        with self.assertRaises(TranslationError):
+            translate_file(self.input_path, self.output_path, chunk_size=64)
+        with open(self.output_path, encoding="utf-8") as file:
+            self.assertEqual(file.read(), "old = 1")
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["input.txt", "output.toml"])
+
+
+class TestTranslateBatch(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.source_dir = os.path.join(self.test_dir, "configs")
+        self.output_dir = os.path.join(self.test_dir, "out")
+        self.state_path = os.path.join(self.test_dir, "state.json")
+        os.makedirs(os.path.join(self.source_dir, "nested"))
+        self._write("a.txt", "set x = 1")
+        self._write("nested/b.txt", "dict(y = 2)")
+        self._write("nested/broken.txt", "dict(y = 2")
+        self._write("notes.md", "set z = 3")
+
+    def _write(self, name, text):
+        with open(os.path.join(self.source_dir, name), "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def _batch(self, *paths, output_dir=None):
+        return translate_batch(paths or [self.source_dir], output_dir or self.output_dir,
+                               jobs=2, state_path=self.state_path)
+
+    def test_mirrored_tree_and_skipping(self):
+        summary = self._batch()
+        self.assertEqual((summary["files"], summary["translated"], summary["skipped"], summary["failed"]), (3, 2, 0, 1))
+        self.assertIn("незакрытый dict(", summary["errors"][0][1])
+        with open(os.path.join(self.output_dir, "nested", "b.toml"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "[[dict]]\ny = 2")
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "notes.toml")))
+
+        summary = self._batch()
+        self.assertEqual((summary["translated"], summary["skipped"], summary["failed"]), (0, 2, 1))
+
+        self._write("a.txt", "set x = 5")
+        summary = self._batch()
+        self.assertEqual((summary["translated"], summary["skipped"], summary["failed"]), (1, 1, 1))
+        with open(os.path.join(self.output_dir, "a.toml"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "x = 5")
+
+    def test_glob_writes_next_to_inputs(self):
+        summary = translate_batch([os.path.join(self.source_dir, "**", "b.txt")], jobs=1, state_path=None)
+        self.assertEqual(summary["translated"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.source_dir, "nested", "b.toml")))
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.watcher = Watcher([self.test_dir])
+
+    def _write(self, name, text, mtime):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.utime(path, ns=(mtime, mtime))
+
+    def _read(self, name):
+        with open(os.path.join(self.test_dir, name), encoding="utf-8") as file:
+            return file.read()
+
+    def test_only_changed_blocks_are_parsed(self):
+        blocks = [f"set c{index} = {index}\ndict(k = .[c{index} * 2].)\n" for index in range(10)]
+        text = "\n".join(blocks)
+        output, cache, parsed = translate_blocks(text, {})
+        self.assertEqual((output, parsed, len(cache)), (transform_input_text(text), 10, 10))
+
+        blocks[3] = "set c3 = .[c9 + 1].\ndict(k = #(1, 2), n = dict(m = $c3$))\n"
+        text = "\n".join(blocks)
+        output, cache, parsed = translate_blocks(text, cache)
+        self.assertEqual((output, parsed), (transform_input_text(text), 1))
+        self.assertRaises(TranslationError, translate_blocks, "dict(a = 1,\n\nb = 2)", cache)
+
+    def _translate(self, translate, text):
+        try:
+            return translate(text)
+        except TranslationError as error:
+            return str(error)
+
+    def test_blocks_match_full_translation(self):
+        _, cache, _ = translate_blocks("set a = 1\n\ndict(y = $a$)", {})
+        for text, cache in (("set a = 1\n\nset a = 2", {}),
+                            ("dict\n\n(a = 1)", {}),
+                            ("dict  \n\n\n(a = 1)", {}),
+                            # Блоки из кэша сдвинуты на две строки вниз.
+                            ("set b = 2\n\nset a = 1\n\ndict(y = $a$)\n\nset a = 3", cache),
+                            ("set b = 2\n\nset a = 1\n\ndict(y = $c$)", cache)):
+            with self.subTest(text=text):
+                self.assertEqual(self._translate(lambda text: translate_blocks(text, cache)[0], text),
+                                 self._translate(transform_input_text, text))
+        self.assertEqual(self._translate(lambda text: translate_blocks(text, {})[0], "set a = 1\n\nset a = 2"),
+                         "строка 3: константа a уже объявлена в строке 1")
+
+    def test_poll_translates_changed_files(self):
+        self._write("a.txt", "set x = 1\n\ndict(y = $x$)", 10**9)
+        self._write("b.txt", "dict(a = 1,\n\n  b = 2)", 10**9)
+        results = self.watcher.poll()
+        self.assertEqual([(os.path.basename(path), message) for path, _, _, _, message in results],
+                         [("a.txt", None), ("b.txt", None)])
+        self.assertEqual(self._read("a.toml"), "x = 1\n[[dict]]\ny = 1")
+        self.assertEqual(self._read("b.toml"), "[[dict]]\na = 1\nb = 2")
+        self.assertEqual(self.watcher.poll(), [])
+
+        self._write("a.txt", "set x = 2\n\ndict(y = $x$)", 2 * 10**9)
+        [(input_path, _, parsed, total, message)] = self.watcher.poll()
+        self.assertEqual((os.path.basename(input_path), parsed, total, message), ("a.txt", 1, 2, None))
+        self.assertEqual(self._read("a.toml"), "x = 2\n[[dict]]\ny = 2")
+
+        self._write("a.txt", "set x = 2\n\ndict(y = $z$)", 3 * 10**9)
+        [(_, _, _, _, message)] = self.watcher.poll()
+        self.assertIn("z", message)
+        self.assertEqual(self._read("a.toml"), "x = 2\n[[dict]]\ny = 2")
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "a.toml.tmp")))
+
 
 if __name__ == "__main__":
     unittest.main()